@@ -0,0 +1,119 @@
+from const import MAGIC_BITBOARDS
+
+# Attack and ray tables, built once at import. Squares are bitboard
+# indices (row * 8 + col, a8 = 0).
+
+# direction index -> (row step, col step); the first four are the rook
+# directions, the last four the bishop directions
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1))
+KNIGHT_OFFSETS = ((-2, 1), (-1, 2), (1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1))
+
+# rays towards higher square indices find their first blocker with the
+# lowest set bit, the others with the highest
+ROOK_UP_RAYS = (1, 3)
+ROOK_DOWN_RAYS = (0, 2)
+BISHOP_UP_RAYS = (6, 7)
+BISHOP_DOWN_RAYS = (4, 5)
+
+
+def _offset_mask(sq, offsets):
+    row, col = sq >> 3, sq & 7
+    mask = 0
+    for dr, dc in offsets:
+        r, c = row + dr, col + dc
+        if 0 <= r < 8 and 0 <= c < 8:
+            mask |= 1 << (r * 8 + c)
+    return mask
+
+def _ray_list(sq, dr, dc):
+    row, col = sq >> 3, sq & 7
+    squares = []
+    r, c = row + dr, col + dc
+    while 0 <= r < 8 and 0 <= c < 8:
+        squares.append(r * 8 + c)
+        r += dr
+        c += dc
+    return squares
+
+
+KNIGHT_ATTACKS = [_offset_mask(sq, KNIGHT_OFFSETS) for sq in range(64)]
+KING_ATTACKS = [_offset_mask(sq, DIRECTIONS) for sq in range(64)]
+# PAWN_ATTACKS[color][sq]: squares a pawn of that colour on sq attacks
+PAWN_ATTACKS = [
+    [_offset_mask(sq, ((-1, -1), (-1, 1))) for sq in range(64)],
+    [_offset_mask(sq, ((1, -1), (1, 1))) for sq in range(64)],
+]
+
+# RAY_LISTS[direction][sq]: squares walked outwards from sq, nearest first
+RAY_LISTS = [[_ray_list(sq, dr, dc) for sq in range(64)] for dr, dc in DIRECTIONS]
+RAYS = [[sum(1 << s for s in ray) for ray in rays] for rays in RAY_LISTS]
+
+# attack sets on an empty board
+ROOK_RAYS = [RAYS[0][sq] | RAYS[1][sq] | RAYS[2][sq] | RAYS[3][sq] for sq in range(64)]
+BISHOP_RAYS = [RAYS[4][sq] | RAYS[5][sq] | RAYS[6][sq] | RAYS[7][sq] for sq in range(64)]
+
+# BETWEEN[a][b]: squares strictly between two aligned squares
+# LINE[a][b]: the whole line through two aligned squares
+# (both 0 when a and b share no rank, file or diagonal)
+def _between_and_line():
+    between = [[0] * 64 for sq in range(64)]
+    line = [[0] * 64 for sq in range(64)]
+    for d, (dr, dc) in enumerate(DIRECTIONS):
+        opposite = DIRECTIONS.index((-dr, -dc))
+        for a in range(64):
+            squares = 0
+            for b in RAY_LISTS[d][a]:
+                between[a][b] = squares
+                line[a][b] = RAYS[d][a] | RAYS[opposite][a] | (1 << a)
+                squares |= 1 << b
+    return between, line
+
+BETWEEN, LINE = _between_and_line()
+
+
+def rook_attacks(sq, occ):
+    rays = RAYS
+    attacks = 0
+    for d in ROOK_UP_RAYS:
+        ray = rays[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[d][(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for d in ROOK_DOWN_RAYS:
+        ray = rays[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[d][blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+def bishop_attacks(sq, occ):
+    rays = RAYS
+    attacks = 0
+    for d in BISHOP_UP_RAYS:
+        ray = rays[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[d][(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for d in BISHOP_DOWN_RAYS:
+        ray = rays[d][sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[d][blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+def queen_attacks(sq, occ):
+    return rook_attacks(sq, occ) | bishop_attacks(sq, occ)
+
+
+# swap in the magic-bitboard lookups; the ray scans above stay as the
+# reference they are built and verified against
+classical_rook_attacks = rook_attacks
+classical_bishop_attacks = bishop_attacks
+
+if MAGIC_BITBOARDS:
+    from magic import load_sliders
+    rook_attacks, bishop_attacks = load_sliders(classical_rook_attacks, classical_bishop_attacks)
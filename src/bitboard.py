@@ -0,0 +1,47 @@
+# Bitboard layout shared by the board and the engines.
+# Square index = row * 8 + col, so index 0 is a8 and index 63 is h1
+# (same orientation as Board.squares).
+
+WHITE = 0
+BLACK = 1
+COLOR_INDEX = {'white': WHITE, 'black': BLACK}
+COLOR_NAMES = ('white', 'black')
+
+PAWN = 0
+KNIGHT = 1
+BISHOP = 2
+ROOK = 3
+QUEEN = 4
+KING = 5
+
+FULL = 0xFFFF_FFFF_FFFF_FFFF
+
+# castling rights bits
+CASTLE_WK = 1
+CASTLE_WQ = 2
+CASTLE_BK = 4
+CASTLE_BQ = 8
+CASTLE_ALL = 15
+
+# CASTLING_MASK[sq]: rights that survive a move from or to sq (king and
+# rook home squares; a rook captured at home loses its side too)
+CASTLING_MASK = [CASTLE_ALL] * 64
+CASTLING_MASK[0] = CASTLE_ALL & ~CASTLE_BQ    # a8
+CASTLING_MASK[4] = CASTLE_ALL & ~(CASTLE_BK | CASTLE_BQ)  # e8
+CASTLING_MASK[7] = CASTLE_ALL & ~CASTLE_BK    # h8
+CASTLING_MASK[56] = CASTLE_ALL & ~CASTLE_WQ   # a1
+CASTLING_MASK[60] = CASTLE_ALL & ~(CASTLE_WK | CASTLE_WQ)  # e1
+CASTLING_MASK[63] = CASTLE_ALL & ~CASTLE_WK   # h1
+
+
+def lsb(bb):
+    return (bb & -bb).bit_length() - 1
+
+def popcount(bb):
+    return bin(bb).count('1')
+
+def iter_bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
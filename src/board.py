@@ -1,257 +1,494 @@
 from const import *
+from bitboard import *
+from attacks import *
+from zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_KEYS
 from square import Square
 from piece import *
-from move import Move
+from move import *
+from movecache import MoveCache
 from sound import Sound
 import copy
 import os
 
+PIECE_KINDS = {
+    Pawn: PAWN,
+    Knight: KNIGHT,
+    Bishop: BISHOP,
+    Rook: ROOK,
+    Queen: QUEEN,
+    King: KING,
+}
+
+PROMOTION_PIECES = {KNIGHT: Knight, BISHOP: Bishop, ROOK: Rook, QUEEN: Queen}
+
+CASTLING_SYMBOLS = ((CASTLE_WK, 'K'), (CASTLE_WQ, 'Q'), (CASTLE_BK, 'k'), (CASTLE_BQ, 'q'))
+
+PIECE_SYMBOLS = {Pawn: 'p', Knight: 'n', Bishop: 'b', Rook: 'r', Queen: 'q', King: 'k'}
+SYMBOL_PIECES = {symbol: cls for cls, symbol in PIECE_SYMBOLS.items()}
+
+def add_promotions(buf, n, from_sq, to_sq, capture):
+    for promo in (PROMO_QUEEN, PROMO_KNIGHT, PROMO_ROOK, PROMO_BISHOP):
+        buf[n] = from_sq | to_sq << 6 | promo | capture
+        n += 1
+    return n
+
+def _copy_piece(piece):
+    return None if piece is None else type(piece)(piece.color)
+
 class Board:
 
     def __init__(self):
         self.squares = [[0, 0, 0, 0, 0, 0, 0, 0] for col in range(COLS)]
+        # bitboard backend, kept in sync with self.squares by _put()
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        # king square index per colour
+        self.king_square = [None, None]
+        self._key = 0
         self.last_move = None
         self._create()
         self._add_pieces('white')
         self._add_pieces('black')
         self.next_player = 'white'
+        # one record per push(): (move, captured piece, castling rights,
+        # en-passant square, halfmove clock, zobrist key) from before the move
         self.move_history = []
         self.halfmove_clock = 0
+        self.fullmove_number = 1
+        # square index a pawn can capture onto en passant, or None
+        self.en_passant = None
+        # CASTLE_* bits still available
+        self.castling_rights = CASTLE_ALL
+        self._buffer = move_buffers(1)[0]
+        # legal move lists by (zobrist key, colour)
+        self.move_cache = MoveCache()
+        self._key = self._compute_key()
 
 
     def move(self, piece, move, testing=False):
-        initial = move.initial
-        final = move.final
-        en_passant_empty = self.squares[final.row][final.col].isempty()
-        captured_piece = self.squares[final.row][final.col].piece
-
-        # Update halfmove clock
-        if isinstance(piece, Pawn) or captured_piece:
-            self.halfmove_clock = 0
-        else:
-            self.halfmove_clock += 1
+        # GUI entry point for a move from piece.moves; the board work is push()
+        m = self.encode_move(move)
+        self.push(m)
 
-        self.squares[initial.row][initial.col].piece = None
-        self.squares[final.row][final.col].piece = piece
+        if m & FLAG_MASK == EN_PASSANT and not testing:
+            sound = Sound(os.path.join('assets/sounds/capture.wav'))
+            sound.play()
+
+        if m & FLAG_MASK in (KING_CASTLE, QUEEN_CASTLE):
+            rook_col = 5 if m & FLAG_MASK == KING_CASTLE else 3
+            self.squares[move.initial.row][rook_col].piece.clear_moves()
 
-        if isinstance(piece, Pawn):
-            diff = final.col - initial.col
-            if diff != 0 and en_passant_empty:
-                self.squares[initial.row][initial.col + diff].piece = None
-                self.squares[final.row][final.col].piece = piece
-                if not testing:
-                    sound = Sound(os.path.join('assets/sounds/capture.wav'))
-                    sound.play()
-            else:
-                self.check_promotion(piece, final)
-
-        if isinstance(piece, King):
-            if self.castling(initial, final) and not testing:
-                diff = final.col - initial.col
-                rook = piece.left_rook if (diff < 0) else piece.right_rook
-                if rook and rook.moves:
-                    self.move(rook, rook.moves[-1])
-
-        piece.moved = True
         piece.clear_moves()
         self.last_move = move
-        self.last_piece = piece
 
 
     def valid_move(self, piece, move):
         return move in piece.moves
 
-    def check_promotion(self, piece, final):
-        if final.row == 0 or final.row == 7:
-            self.squares[final.row][final.col].piece = Queen(piece.color)
-
-    def castling(self, initial, final):
-        return abs(initial.col - final.col) == 2
-
-    def set_true_en_passant(self, piece):
-        if not isinstance(piece, Pawn): return
-        for row in range(ROWS):
-            for col in range(COLS):
-                p = self.squares[row][col].piece
-                if isinstance(p, Pawn): p.en_passant = False
-        piece.en_passant = True
-
     def in_check(self, color):
-        king_pos = None
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.squares[row][col].piece
-                if piece and isinstance(piece, King) and piece.color == color:
-                    king_pos = (row, col)
-                    break
-            if king_pos: break
-        if not king_pos: return False
-
-        king_row, king_col = king_pos
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.squares[row][col].piece
-                if piece and piece.color != color:
-                    self.calc_moves(piece, row, col, bool=False)
-                    for move in piece.moves:
-                        if move.final.row == king_row and move.final.col == king_col:
-                            return True
-        return False
-
-    def causes_check(self, piece, move):
-        self.make_move(piece, move)
-        self.next_turn()
-        is_in_check = self.in_check(piece.color)
-        self.prev_turn()
-        self.unmake_move()
-        return is_in_check
+        king_sq = self.king_square[COLOR_INDEX[color]]
+        if king_sq is None: return False
+        return self.is_square_attacked(king_sq, COLOR_NAMES[COLOR_INDEX[color] ^ 1])
+
+    def is_square_attacked(self, sq, by_color):
+        # sq is a square index (row * 8 + col)
+        return self._attacked(sq, COLOR_INDEX[by_color], self.occupied)
+
+    def attackers_to(self, sq, by_color):
+        # bitboard of by_color's pieces attacking square index sq
+        base = COLOR_INDEX[by_color] * 6
+        bbs = self.bitboards
+        occ = self.occupied
+        return ((KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT])
+                | (KING_ATTACKS[sq] & bbs[base + KING])
+                | (PAWN_ATTACKS[COLOR_INDEX[by_color] ^ 1][sq] & bbs[base + PAWN])
+                | (rook_attacks(sq, occ) & (bbs[base + ROOK] | bbs[base + QUEEN]))
+                | (bishop_attacks(sq, occ) & (bbs[base + BISHOP] | bbs[base + QUEEN])))
 
 
     def is_checkmate(self, color):
-        if not self.in_check(color): return False
-        return len(self.get_all_valid_moves(color)) == 0
+        return self.game_status(color) == 'checkmate'
+
+    def has_legal_move(self, color, checks=None):
+        # The king's moves first, since they usually settle it, then one
+        # pass over the other pieces. checks is _checks_and_pins() for
+        # color's king, if the caller already has it.
+        us = COLOR_INDEX[color]
+        buf = self._buffer
+        king_sq = self.king_square[us]
+        if king_sq is None:
+            return self.generate_moves(color, buf) > 0
+        # a king step to a safe square (castling implies one, so it needn't
+        # be generated)
+        them = us ^ 1
+        without_king = self.occupied ^ (1 << king_sq)
+        for to in iter_bits(KING_ATTACKS[king_sq] & ~self.occupancy[us]):
+            if not self._attacked(to, them, without_king):
+                return True
+        if checks is None:
+            checks = self._checks_and_pins(king_sq, us)
+        checkers = checks[0]
+        if checkers & (checkers - 1):
+            return False  # double check and the king can't move
+        return self.generate_moves(color, buf, FULL ^ (1 << king_sq), checks=checks) > 0
+
+    def game_status(self, color):
+        # 'ongoing', 'checkmate' or 'stalemate' with color to move
+        us = COLOR_INDEX[color]
+        king_sq = self.king_square[us]
+        checks = self._checks_and_pins(king_sq, us) if king_sq is not None else None
+        if self.has_legal_move(color, checks):
+            return 'ongoing'
+        return 'checkmate' if checks is not None and checks[0] else 'stalemate'
 
     def get_all_valid_moves(self, color):
         all_moves = []
-        for row in range(ROWS):
-            for col in range(COLS):
-                square = self.squares[row][col]
-                if square.has_piece():
-                    piece = square.piece
-                    if piece.color == color:
-                        self.calc_moves(piece, row, col)
-                        for move in piece.moves:
-                            all_moves.append((piece, move))
+        for m in self.cached_moves(color):
+            all_moves.append(self.to_move(m))
         return all_moves
 
-    def calc_moves(self, piece, row, col, bool=True):
-        def pawn_moves():
-            steps = 1 if piece.moved else 2
-            start = row + piece.dir
-            end = row + (piece.dir * (1 + steps))
-            for r in range(start, end, piece.dir):
-                if Square.in_range(r) and self.squares[r][col].isempty():
-                    move = Move(Square(row, col), Square(r, col))
-                    if not bool or not self.causes_check(piece, move):
-                        piece.add_move(move)
+    def legal_moves(self, color, from_mask=FULL):
+        # packed legal moves for color as a list
+        moves = self.cached_moves(color)
+        if from_mask == FULL:
+            return list(moves)
+        return [m for m in moves if from_mask & (1 << (m & 63))]
+
+    def cached_moves(self, color):
+        # all packed legal moves for color as a tuple, generated once per
+        # position through the move cache
+        key = (self._key, color)
+        moves = self.move_cache.get(key)
+        if moves is None:
+            buf = self._buffer
+            moves = tuple(buf[:self.generate_moves(color, buf)])
+            self.move_cache.put(key, moves)
+        return moves
+
+    def is_legal(self, color, m):
+        # checks a packed move from elsewhere (killer, hash move) by
+        # generating the moves of the piece on its from-square only
+        buf = self._buffer
+        n = self.generate_moves(color, buf, 1 << move_from(m))
+        return m in buf[:n]
+
+    def generate_moves(self, color, buf, from_mask=FULL, captures=True, quiets=True, checks=None):
+        # Writes the packed legal moves of color (limited to the pieces on
+        # from_mask) into buf and returns how many there are. Checkers and
+        # pins are worked out once, then pseudo-legal targets are filtered
+        # with masks instead of make/unmake.
+        # captures=False / quiets=False leave out one half of the list;
+        # promotions count as captures, castling as quiet. checks can pass
+        # in _checks_and_pins() when the caller has already worked it out.
+        us = COLOR_INDEX[color]
+        them = us ^ 1
+        bbs = self.bitboards
+        enemy = self.occupancy[them]
+        occ = self.occupied
+        base = us * 6
+        n = 0
+        targets = (enemy if captures else 0) | (~occ & FULL if quiets else 0)
+
+        king_sq = self.king_square[us]
+        kings = bbs[base + KING]
+        if checks is not None:
+            checkers, check_mask, pins = checks
+        elif king_sq is not None:
+            checkers, check_mask, pins = self._checks_and_pins(king_sq, us)
+        else:
+            checkers, check_mask, pins = 0, FULL, {}
+
+        if kings & from_mask:
+            # the king must not shield the square it steps back onto
+            without_king = occ ^ kings
+            for to in iter_bits(KING_ATTACKS[king_sq] & targets):
+                if not self._attacked(to, them, without_king):
+                    buf[n] = king_sq | to << 6 | (CAPTURE if enemy & (1 << to) else QUIET)
+                    n += 1
+            if quiets and not checkers:
+                n = self._castling_moves(us, king_sq, buf, n)
+
+        # double check: only the king can move
+        if checkers & (checkers - 1):
+            return n
+
+        forward = -8 if us == WHITE else 8
+        start_row = 6 if us == WHITE else 1
+        promotion_row = 0 if us == WHITE else 7
+        for sq in iter_bits(bbs[base + PAWN] & from_mask):
+            allowed = check_mask & pins.get(sq, FULL)
+            to = sq + forward
+            if not occ & (1 << to):
+                if allowed & (1 << to):
+                    if to >> 3 == promotion_row:
+                        if captures:
+                            n = add_promotions(buf, n, sq, to, QUIET)
+                    elif quiets:
+                        buf[n] = sq | to << 6
+                        n += 1
+                if quiets and sq >> 3 == start_row:
+                    to += forward
+                    if not occ & (1 << to) and allowed & (1 << to):
+                        buf[n] = sq | to << 6 | DOUBLE_PUSH
+                        n += 1
+            if not captures: continue
+            for to in iter_bits(PAWN_ATTACKS[us][sq] & enemy & allowed):
+                if to >> 3 == promotion_row:
+                    n = add_promotions(buf, n, sq, to, CAPTURE)
                 else:
-                    break
-            for dc in [-1, 1]:
-                r, c = row + piece.dir, col + dc
-                if Square.in_range(r, c):
-                    if self.squares[r][c].has_enemy_piece(piece.color):
-                        move = Move(Square(row, col), Square(r, c, self.squares[r][c].piece))
-                        if not bool or not self.causes_check(piece, move):
-                            piece.add_move(move)
-            if row == (3 if piece.color == 'white' else 4):
-                fr = 2 if piece.color == 'white' else 5
-                for dc in [-1, 1]:
-                    if Square.in_range(col + dc):
-                        target = self.squares[row][col + dc].piece
-                        if isinstance(target, Pawn) and target.color != piece.color and target.en_passant:
-                            move = Move(Square(row, col), Square(fr, col + dc, target))
-                            if not bool or not self.causes_check(piece, move):
-                                piece.add_move(move)
-
-        def knight_moves():
-            for dr, dc in [(-2,1), (-1,2), (1,2), (2,1), (2,-1), (1,-2), (-1,-2), (-2,-1)]:
-                r, c = row + dr, col + dc
-                if Square.in_range(r, c) and self.squares[r][c].isempty_or_enemy(piece.color):
-                    move = Move(Square(row, col), Square(r, c, self.squares[r][c].piece))
-                    if not bool or not self.causes_check(piece, move):
-                        piece.add_move(move)
-
-        def straightline_moves(directions):
-            for dr, dc in directions:
-                r, c = row + dr, col + dc
-                while Square.in_range(r, c):
-                    dest = self.squares[r][c]
-                    move = Move(Square(row, col), Square(r, c, dest.piece))
-                    if dest.isempty():
-                        if not bool or not self.causes_check(piece, move):
-                            piece.add_move(move)
-                    elif dest.has_enemy_piece(piece.color):
-                        if not bool or not self.causes_check(piece, move):
-                            piece.add_move(move)
-                        break
-                    else:
-                        break
-                    r += dr
-                    c += dc
-
-        def king_moves():
-            for dr in [-1, 0, 1]:
-                for dc in [-1, 0, 1]:
-                    if dr == 0 and dc == 0: continue
-                    r, c = row + dr, col + dc
-                    if Square.in_range(r, c) and self.squares[r][c].isempty_or_enemy(piece.color):
-                        move = Move(Square(row, col), Square(r, c, self.squares[r][c].piece))
-                        if not bool or not self.causes_check(piece, move):
-                            piece.add_move(move)
-            if not piece.moved:
-                for side, rook_col, path_cols, king_final_col, rook_final_col in [
-                    ('left', 0, [1,2,3], 2, 3),
-                    ('right', 7, [5,6], 6, 5)
-                ]:
-                    rook = self.squares[row][rook_col].piece
-                    if isinstance(rook, Rook) and not rook.moved:
-                        if all(self.squares[row][c].isempty() for c in path_cols):
-                            moveK = Move(Square(row, col), Square(row, king_final_col))
-                            moveR = Move(Square(row, rook_col), Square(row, rook_final_col))
-                            if not bool or not self.causes_check(piece, moveK):
-                                piece.add_move(moveK)
-                                rook.add_move(moveR)
+                    buf[n] = sq | to << 6 | CAPTURE
+                    n += 1
+
+        ep = self.en_passant
+        if captures and ep is not None and ep >> 3 == (2 if us == WHITE else 5):
+            for sq in iter_bits(PAWN_ATTACKS[them][ep] & bbs[base + PAWN] & from_mask):
+                if self._en_passant_legal(us, sq, ep, king_sq, check_mask, pins.get(sq, FULL)):
+                    buf[n] = sq | ep << 6 | EN_PASSANT
+                    n += 1
+
+        for sq in iter_bits(bbs[base + KNIGHT] & from_mask):
+            if sq in pins: continue
+            for to in iter_bits(KNIGHT_ATTACKS[sq] & targets & check_mask):
+                buf[n] = sq | to << 6 | (CAPTURE if enemy & (1 << to) else QUIET)
+                n += 1
+
+        for kind, attacks in ((BISHOP, bishop_attacks), (ROOK, rook_attacks), (QUEEN, queen_attacks)):
+            for sq in iter_bits(bbs[base + kind] & from_mask):
+                allowed = targets & check_mask & pins.get(sq, FULL)
+                for to in iter_bits(attacks(sq, occ) & allowed):
+                    buf[n] = sq | to << 6 | (CAPTURE if enemy & (1 << to) else QUIET)
+                    n += 1
+
+        return n
+
+    def _checks_and_pins(self, king_sq, us):
+        # pieces giving check, the squares that answer a single check
+        # (block or capture) and a {pinned square: line it may move along} map
+        them = us ^ 1
+        bbs = self.bitboards
+        own = self.occupancy[us]
+        occ = self.occupied
+        base = them * 6
+        checkers = KNIGHT_ATTACKS[king_sq] & bbs[base + KNIGHT]
+        checkers |= PAWN_ATTACKS[us][king_sq] & bbs[base + PAWN]
+        check_mask = checkers
+        pins = {}
+
+        # enemy sliders that would see the king on an empty board
+        snipers = ((ROOK_RAYS[king_sq] & (bbs[base + ROOK] | bbs[base + QUEEN]))
+                   | (BISHOP_RAYS[king_sq] & (bbs[base + BISHOP] | bbs[base + QUEEN])))
+        between = BETWEEN[king_sq]
+        for sq in iter_bits(snipers):
+            blockers = between[sq] & occ
+            if not blockers:
+                checkers |= 1 << sq
+                check_mask |= between[sq] | 1 << sq
+            elif not blockers & (blockers - 1) and blockers & own:
+                pins[lsb(blockers)] = between[sq] | 1 << sq
+
+        if not checkers:
+            check_mask = FULL
+        return checkers, check_mask, pins
+
+    def _attacked(self, sq, by, occ):
+        # works backwards from sq: knight and king tables, pawn diagonals,
+        # then slider rays that stop at the first blocker in occ
+        bbs = self.bitboards
+        base = by * 6
+        if KNIGHT_ATTACKS[sq] & bbs[base + KNIGHT]: return True
+        if KING_ATTACKS[sq] & bbs[base + KING]: return True
+        if PAWN_ATTACKS[by ^ 1][sq] & bbs[base + PAWN]: return True
+        rooks = bbs[base + ROOK] | bbs[base + QUEEN]
+        if rooks & ROOK_RAYS[sq] and rook_attacks(sq, occ) & rooks: return True
+        bishops = bbs[base + BISHOP] | bbs[base + QUEEN]
+        if bishops & BISHOP_RAYS[sq] and bishop_attacks(sq, occ) & bishops: return True
+        return False
 
+    def _en_passant_legal(self, us, sq, to, king_sq, check_mask, pin_mask):
+        captured = to + (8 if us == WHITE else -8)
+        if not pin_mask & (1 << to): return False
+        # either the landing square blocks the check or the captured pawn gave it
+        if not check_mask & ((1 << to) | (1 << captured)): return False
+        # both pawns leave the rank at once, which can expose the king
+        if king_sq is not None:
+            occ = (self.occupied ^ (1 << sq) ^ (1 << captured)) | (1 << to)
+            base = (us ^ 1) * 6
+            bbs = self.bitboards
+            if rook_attacks(king_sq, occ) & (bbs[base + ROOK] | bbs[base + QUEEN]): return False
+            if bishop_attacks(king_sq, occ) & (bbs[base + BISHOP] | bbs[base + QUEEN]): return False
+        return True
+
+    def _castling_moves(self, us, king_sq, buf, n):
+        row = 7 if us == WHITE else 0
+        if king_sq != row * 8 + 4: return n
+        queen_side, king_side = (CASTLE_WQ, CASTLE_WK) if us == WHITE else (CASTLE_BQ, CASTLE_BK)
+        for bit, path_cols, king_cols, flag in [(queen_side, (1, 2, 3), (3, 2), QUEEN_CASTLE), (king_side, (5, 6), (5, 6), KING_CASTLE)]:
+            # the right implies king and rook are still on their home squares
+            if not self.castling_rights & bit: continue
+            if any(self.squares[row][c].has_piece() for c in path_cols): continue
+            # the king may not pass through or land on an attacked square
+            if any(self.is_square_attacked(row * 8 + c, COLOR_NAMES[us ^ 1]) for c in king_cols): continue
+            buf[n] = king_sq | (row * 8 + king_cols[-1]) << 6 | flag
+            n += 1
+        return n
+
+    def to_move(self, m):
+        # packed move -> (piece, Move) for the GUI and other object-based
+        # callers; an underpromotion keeps its piece in Move.promotion
+        from_sq, to_sq = m & 63, (m >> 6) & 63
+        row, col = from_sq >> 3, from_sq & 7
+        r, c = to_sq >> 3, to_sq & 7
+        promotion = promotion_kind(m) if m & PROMOTION and promotion_kind(m) != QUEEN else None
+        return self.squares[row][col].piece, Move(Square(row, col), Square(r, c), promotion)
+
+    def encode_move(self, move):
+        # Move -> packed move in the current position (promotions become
+        # queens unless move.promotion names another piece)
+        from_sq = move.initial.row * 8 + move.initial.col
+        to_sq = move.final.row * 8 + move.final.col
+        piece = self.squares[move.initial.row][move.initial.col].piece
+        m = from_sq | to_sq << 6
+        if self.occupied & (1 << to_sq):
+            m |= CAPTURE
+        if isinstance(piece, Pawn):
+            if move.initial.col != move.final.col and not m & CAPTURE:
+                m |= EN_PASSANT
+            elif abs(move.final.row - move.initial.row) == 2:
+                m |= DOUBLE_PUSH
+            elif move.final.row == 0 or move.final.row == 7:
+                m |= PROMOTION | ((move.promotion or QUEEN) - 1) << 12
+        elif isinstance(piece, King) and abs(move.final.col - move.initial.col) == 2:
+            m |= KING_CASTLE if move.final.col == 6 else QUEEN_CASTLE
+        return m
+
+    def calc_moves(self, piece, row, col):
+        # fills piece.moves with its legal moves, for the GUI; it has no
+        # promotion picker, so pawns only get the queen promotions
         piece.clear_moves()
-        if isinstance(piece, Pawn): pawn_moves()
-        elif isinstance(piece, Knight): knight_moves()
-        elif isinstance(piece, Bishop): straightline_moves([(-1,-1), (-1,1), (1,-1), (1,1)])
-        elif isinstance(piece, Rook): straightline_moves([(-1,0), (1,0), (0,-1), (0,1)])
-        elif isinstance(piece, Queen): straightline_moves([(-1,-1), (-1,1), (1,-1), (1,1), (-1,0), (1,0), (0,-1), (0,1)])
-        elif isinstance(piece, King): king_moves()
+        for m in self.legal_moves(piece.color, 1 << (row * 8 + col)):
+            if m & PROMOTION and promotion_kind(m) != QUEEN: continue
+            piece.add_move(self.to_move(m)[1])
+            if m & FLAG_MASK in (KING_CASTLE, QUEEN_CASTLE):
+                rook_col, rook_final_col = (0, 3) if m & FLAG_MASK == QUEEN_CASTLE else (7, 5)
+                rook = self.squares[row][rook_col].piece
+                rook.add_move(Move(Square(row, rook_col), Square(row, rook_final_col)))
 
     def _create(self):
         for row in range(ROWS):
             for col in range(COLS):
-                self.squares[row][col] = Square(row, col)
+                self.squares[row][col] = Square.cell(row, col)
 
     def _add_pieces(self, color):
         row_pawn, row_other = (6, 7) if color == 'white' else (1, 0)
         for col in range(COLS):
-            self.squares[row_pawn][col] = Square(row_pawn, col, Pawn(color))
+            self._put(row_pawn, col, Pawn(color))
         placements = [
             (Rook, 0), (Knight, 1), (Bishop, 2), (Queen, 3), (King, 4),
             (Bishop, 5), (Knight, 6), (Rook, 7)
         ]
         for cls, col in placements:
-            self.squares[row_other][col] = Square(row_other, col, cls(color))
+            self._put(row_other, col, cls(color))
+
+    def _put(self, row, col, piece):
+        # single entry point for changing a square: keeps the bitboards,
+        # king squares and zobrist key in sync
+        square = self.squares[row][col]
+        sq = row * 8 + col
+        mask = 1 << sq
+        old = square.piece
+        if old is not None:
+            color = COLOR_INDEX[old.color]
+            kind = PIECE_KINDS[type(old)]
+            self.bitboards[color * 6 + kind] ^= mask
+            self.occupancy[color] ^= mask
+            self.occupied ^= mask
+            self._key ^= PIECE_KEYS[color * 6 + kind][sq]
+            if kind == KING and self.king_square[color] == sq: self.king_square[color] = None
+        square.piece = piece
+        if piece is not None:
+            color = COLOR_INDEX[piece.color]
+            kind = PIECE_KINDS[type(piece)]
+            self.bitboards[color * 6 + kind] ^= mask
+            self.occupancy[color] ^= mask
+            self.occupied ^= mask
+            self._key ^= PIECE_KEYS[color * 6 + kind][sq]
+            if kind == KING: self.king_square[color] = sq
+
+    def _sync_indexes(self):
+        # occupancy and king squares rebuilt from the bitboards
+        bbs = self.bitboards
+        self.occupancy = [bbs[0] | bbs[1] | bbs[2] | bbs[3] | bbs[4] | bbs[5],
+                          bbs[6] | bbs[7] | bbs[8] | bbs[9] | bbs[10] | bbs[11]]
+        self.occupied = self.occupancy[0] | self.occupancy[1]
+        self.king_square = [lsb(bbs[KING]) if bbs[KING] else None,
+                            lsb(bbs[6 + KING]) if bbs[6 + KING] else None]
+
+    def clone(self):
+        # independent board in the same position, for copy-make search and
+        # analysis threads: a shallow copy plus own copies of everything
+        # push/pop or the GUI mutate. Pieces (on the board and captured
+        # ones in the history) are copied, since their move lists and
+        # texture rects are per-board state; the move cache isn't shared
+        # between threads either.
+        board = copy.copy(self)
+        board.squares = [[Square.cell(square.row, square.col, _copy_piece(square.piece))
+                          for square in row] for row in self.squares]
+        board.bitboards = self.bitboards[:]
+        board.occupancy = self.occupancy[:]
+        board.king_square = self.king_square[:]
+        board.move_history = [(m, _copy_piece(captured), *state) for m, captured, *state in self.move_history]
+        board._buffer = move_buffers(1)[0]
+        board.move_cache = MoveCache(self.move_cache.capacity)
+        return board
+
+    def snapshot(self):
+        # immutable copy of the position (pieces, bitboards, irreversible
+        # state, key and history) that restore() puts back in O(64)
+        return (tuple(square.piece for row in self.squares for square in row), tuple(self.bitboards),
+                self.next_player, self.castling_rights, self.en_passant, self.halfmove_clock,
+                self.fullmove_number, self._key, tuple(self.move_history), self.last_move)
+
+    def restore(self, snapshot):
+        (pieces, bitboards, self.next_player, self.castling_rights, self.en_passant, self.halfmove_clock,
+         self.fullmove_number, self._key, move_history, self.last_move) = snapshot
+        for sq, piece in enumerate(pieces):
+            self.squares[sq >> 3][sq & 7].piece = piece
+        self.bitboards = list(bitboards)
+        self.move_history = list(move_history)
+        self._sync_indexes()
 
-    def count_moves(self):
-        count = 0
-        for row in self.squares:
-            for square in row:
-                piece = square.piece
-                if piece:
-                    count += len(getattr(piece, 'moves', []))
-        return count
-    
     def next_turn(self):
         self.next_player = 'white' if self.next_player == 'black' else 'black'
+        self._key ^= SIDE_KEY
 
     def prev_turn(self):
         self.next_player = 'white' if self.next_player == 'black' else 'black'
+        self._key ^= SIDE_KEY
 
+    @property
+    def zobrist_key(self):
+        # 64-bit key of pieces, side to move, castling rights and en-passant file
+        return self._key
+
+    def _state_key(self):
+        key = CASTLING_KEYS[self.castling_rights]
+        if self.en_passant is not None:
+            key ^= EP_KEYS[self.en_passant & 7]
+        return key
+
+    def _compute_key(self):
+        key = 0
+        for idx, bb in enumerate(self.bitboards):
+            for sq in iter_bits(bb):
+                key ^= PIECE_KEYS[idx][sq]
+        if self.next_player == 'black':
+            key ^= SIDE_KEY
+        return key ^ self._state_key()
 
-    def fen(self):
-        piece_to_fen = {
-            Pawn: 'p',
-            Knight: 'n',
-            Bishop: 'b',
-            Rook: 'r',
-            Queen: 'q',
-            King: 'k',
-        }
 
+    def fen(self):
+        # written straight from the board state, no move history needed
         fen_rows = []
         for row in self.squares:
             empty = 0
@@ -264,214 +501,159 @@ class Board:
                     if empty > 0:
                         fen_row += str(empty)
                         empty = 0
-                    symbol = piece_to_fen.get(type(piece), '?')
+                    symbol = PIECE_SYMBOLS[type(piece)]
                     fen_row += symbol.upper() if piece.color == 'white' else symbol
             if empty > 0:
                 fen_row += str(empty)
             fen_rows.append(fen_row)
 
         board_part = '/'.join(fen_rows)
+        active_color = 'w' if self.next_player == 'white' else 'b'
+        castling_rights = ''.join(symbol for bit, symbol in CASTLING_SYMBOLS if self.castling_rights & bit) or '-'
 
-        # Active color (assumes white moves first; toggle based on self.last_move)
-        active_color = 'w' if not self.last_piece or self.last_piece.color == 'black' else 'b'
-
-        # Castling rights
-        castling_rights = ''
-        for row in [0, 7]:
-            king = self.squares[row][4].piece
-            if isinstance(king, King) and not king.moved:
-                if isinstance(self.squares[row][7].piece, Rook) and not self.squares[row][7].piece.moved:
-                    castling_rights += 'K' if row == 7 else 'k'
-                if isinstance(self.squares[row][0].piece, Rook) and not self.squares[row][0].piece.moved:
-                    castling_rights += 'Q' if row == 7 else 'q'
-        if not castling_rights:
-            castling_rights = '-'
-
-        # En passant target square
         en_passant = '-'
-        if isinstance(self.last_piece, Pawn):
-            diff = abs(self.last_move.initial.row - self.last_move.final.row)
-            if diff == 2:
-                col = self.last_move.initial.col
-                mid_row = (self.last_move.initial.row + self.last_move.final.row) // 2
-                en_passant = f"{chr(col + ord('a'))}{8 - mid_row}"
+        if self.en_passant is not None:
+            en_passant = f"{chr((self.en_passant & 7) + ord('a'))}{8 - (self.en_passant >> 3)}"
 
-        # Halfmove clock (simplified to 0 always)
-        halfmove_clock = '0'
-
-        # Fullmove number (count of full turns)
-        fullmove_number = '1' if not self.last_move else str((self.count_moves() // 2) + 1)
-
-        return f"{board_part} {active_color} {castling_rights} {en_passant} {halfmove_clock} {fullmove_number}"
+        return f"{board_part} {active_color} {castling_rights} {en_passant} {self.halfmove_clock} {self.fullmove_number}"
 
     def make_move(self, piece, move):
-        initial = move.initial
-        final = move.final
-        captured = self.squares[final.row][final.col].piece
-        promotion = False
-        en_passant_capture = None
-        rook_move = None
-
-        # Handle en passant capture
-        if isinstance(piece, Pawn):
-            if initial.col != final.col and captured is None:
-                en_passant_row = final.row + (1 if piece.color == 'white' else -1)
-                en_passant_capture = self.squares[en_passant_row][final.col].piece
-                self.squares[en_passant_row][final.col].piece = None
-
-        # Handle castling rook move
-        if isinstance(piece, King) and abs(initial.col - final.col) == 2:
-            row = initial.row
-            if final.col == 6:  # King-side
-                rook = self.squares[row][7].piece
-                self.squares[row][7].piece = None
-                self.squares[row][5].piece = rook
-                rook_move = (rook, Square(row, 7), Square(row, 5))
-            else:  # Queen-side
-                rook = self.squares[row][0].piece
-                self.squares[row][0].piece = None
-                self.squares[row][3].piece = rook
-                rook_move = (rook, Square(row, 0), Square(row, 3))
-
-        # Save en passant state
-        en_passant_prev = piece.en_passant if isinstance(piece, Pawn) else None
-
-        # Move piece
-        self.squares[initial.row][initial.col].piece = None
-        self.squares[final.row][final.col].piece = piece
-
-        # Handle promotion
-        if isinstance(piece, Pawn) and (final.row == 0 or final.row == 7):
-            piece = Queen(piece.color)
-            self.squares[final.row][final.col].piece = piece
-            promotion = True
-
-        # Save to history
-        self.move_history.append((piece, move, captured, piece.moved, promotion, en_passant_capture, en_passant_prev, rook_move))
-        piece.moved = True
-
+        self.push(self.encode_move(move))
 
     def unmake_move(self):
         if not self.move_history:
             return
+        self.pop()
 
-        piece, move, captured, piece_moved, promotion, en_passant_capture, en_passant_prev, rook_move = self.move_history.pop()
-        initial = move.initial
-        final = move.final
+    def push(self, m):
+        # play a packed move; the side to move is left to next_turn()
+        from_sq, to_sq, flag = m & 63, (m >> 6) & 63, m & FLAG_MASK
+        row, col = from_sq >> 3, from_sq & 7
+        r, c = to_sq >> 3, to_sq & 7
+        piece = self.squares[row][col].piece
 
-        # Undo promotion
-        if promotion:
+        if flag == EN_PASSANT:
+            captured = self.squares[row][c].piece
+        else:
+            captured = self.squares[r][c].piece
+        self.move_history.append((m, captured, self.castling_rights, self.en_passant, self.halfmove_clock, self._key))
+
+        if flag == EN_PASSANT:
+            self._put(row, c, None)
+        elif flag == KING_CASTLE:
+            self._put(row, 5, self.squares[row][7].piece)
+            self._put(row, 7, None)
+        elif flag == QUEEN_CASTLE:
+            self._put(row, 3, self.squares[row][0].piece)
+            self._put(row, 0, None)
+
+        self._put(row, col, None)
+        if flag & PROMOTION:
+            self._put(r, c, PROMOTION_PIECES[promotion_kind(m)](piece.color))
+        else:
+            self._put(r, c, piece)
+
+        # irreversible state, keeping its part of the key up to date
+        if self.en_passant is not None:
+            self._key ^= EP_KEYS[self.en_passant & 7]
+        self.en_passant = (row + r) // 2 * 8 + col if flag == DOUBLE_PUSH else None
+        if self.en_passant is not None:
+            self._key ^= EP_KEYS[self.en_passant & 7]
+        rights = self.castling_rights & CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        if rights != self.castling_rights:
+            self._key ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[rights]
+            self.castling_rights = rights
+        self.halfmove_clock = 0 if captured or isinstance(piece, Pawn) else self.halfmove_clock + 1
+        if piece.color == 'black':
+            self.fullmove_number += 1
+
+    def pop(self):
+        # take back the last push(). The key is restored from the record,
+        # so undo next_turn() (prev_turn) before calling this.
+        m, captured, rights, en_passant, halfmove_clock, key = self.move_history.pop()
+        from_sq, to_sq, flag = m & 63, (m >> 6) & 63, m & FLAG_MASK
+        row, col = from_sq >> 3, from_sq & 7
+        r, c = to_sq >> 3, to_sq & 7
+        piece = self.squares[r][c].piece
+        if flag & PROMOTION:
             piece = Pawn(piece.color)
 
-        # Put piece back
-        self.squares[initial.row][initial.col].piece = piece
-        self.squares[final.row][final.col].piece = captured
-
-        # Restore en passant capture
-        if en_passant_capture:
-            row = final.row + (1 if piece.color == 'white' else -1)
-            self.squares[row][final.col].piece = en_passant_capture
-
-        # Restore en passant flag
-        if isinstance(piece, Pawn):
-            piece.en_passant = en_passant_prev
-
-        # Undo castling rook move
-        if rook_move:
-            rook, start, end = rook_move
-            self.squares[start.row][start.col].piece = rook
-            self.squares[end.row][end.col].piece = None
-
-        piece.moved = piece_moved
+        if flag == EN_PASSANT:
+            self._put(r, c, None)
+            self._put(row, c, captured)
+        else:
+            self._put(r, c, captured)
+        self._put(row, col, piece)
+
+        if flag == KING_CASTLE:
+            self._put(row, 7, self.squares[row][5].piece)
+            self._put(row, 5, None)
+        elif flag == QUEEN_CASTLE:
+            self._put(row, 0, self.squares[row][3].piece)
+            self._put(row, 3, None)
+
+        self.castling_rights = rights
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        if piece.color == 'black':
+            self.fullmove_number -= 1
+        self._key = key
 
     def load_fen(self, fen):
-        piece_map = {
-            'p': Pawn,
-            'n': Knight,
-            'b': Bishop,
-            'r': Rook,
-            'q': Queen,
-            'k': King
-        }
-
+        # the two move counters may be left off (EPD style)
         parts = fen.strip().split()
         board_part = parts[0]
         active_color = parts[1]
         castling_rights = parts[2]
         en_passant = parts[3]
-        # halfmove_clock = int(parts[4])  # optional, if you track this
-        # fullmove_number = int(parts[5])  # optional
-
-        # Clear board first
-        for row in range(ROWS):
-            for col in range(COLS):
-                self.squares[row][col].piece = None
-
-        rows = board_part.split('/')
-        for row_idx, fen_row in enumerate(rows):
+        halfmove_clock = parts[4] if len(parts) > 4 else '0'
+        fullmove_number = parts[5] if len(parts) > 5 else '1'
+
+        # whole-board reset: fill squares and bitboards directly, then
+        # rebuild the derived sets once instead of going through _put
+        bitboards = [0] * 12
+        for row_idx, fen_row in enumerate(board_part.split('/')):
+            row = self.squares[row_idx]
             col_idx = 0
             for char in fen_row:
                 if char.isdigit():
-                    col_idx += int(char)  # empty squares
+                    for col in range(col_idx, col_idx + int(char)):  # empty squares
+                        row[col].piece = None
+                    col_idx += int(char)
                 else:
                     color = 'white' if char.isupper() else 'black'
-                    piece_class = piece_map[char.lower()]
-                    self.squares[row_idx][col_idx].piece = piece_class(color)
+                    piece_class = SYMBOL_PIECES[char.lower()]
+                    row[col_idx].piece = piece_class(color)
+                    bitboards[COLOR_INDEX[color] * 6 + PIECE_KINDS[piece_class]] |= 1 << (row_idx * 8 + col_idx)
                     col_idx += 1
+        self.bitboards = bitboards
+        self._sync_indexes()
 
         # Set next player to move
         self.next_player = 'white' if active_color == 'w' else 'black'
 
-        # Set castling rights (optional - implement flags on King and Rooks or Board)
-        # For simplicity, you can set moved = True/False on rooks/kings accordingly:
-        # Example:
-        for row in [0, 7]:
+        # Castling rights, dropping any whose king or rook is not at home
+        self.castling_rights = 0
+        for bit, symbol, row, rook_col in [(CASTLE_WK, 'K', 7, 7), (CASTLE_WQ, 'Q', 7, 0), (CASTLE_BK, 'k', 0, 7), (CASTLE_BQ, 'q', 0, 0)]:
             king = self.squares[row][4].piece
-            if isinstance(king, King):
-                king.moved = True  # default to moved, will clear below if rights exist
-                # Reset all rook moved states as well to True, then clear below if rights allow
-                for col in [0, 7]:
-                    rook = self.squares[row][col].piece
-                    if isinstance(rook, Rook):
-                        rook.moved = True
-
-        if 'K' in castling_rights:
-            if isinstance(self.squares[7][4].piece, King):
-                self.squares[7][4].piece.moved = False
-            if isinstance(self.squares[7][7].piece, Rook):
-                self.squares[7][7].piece.moved = False
-        if 'Q' in castling_rights:
-            if isinstance(self.squares[7][4].piece, King):
-                self.squares[7][4].piece.moved = False
-            if isinstance(self.squares[7][0].piece, Rook):
-                self.squares[7][0].piece.moved = False
-        if 'k' in castling_rights:
-            if isinstance(self.squares[0][4].piece, King):
-                self.squares[0][4].piece.moved = False
-            if isinstance(self.squares[0][7].piece, Rook):
-                self.squares[0][7].piece.moved = False
-        if 'q' in castling_rights:
-            if isinstance(self.squares[0][4].piece, King):
-                self.squares[0][4].piece.moved = False
-            if isinstance(self.squares[0][0].piece, Rook):
-                self.squares[0][0].piece.moved = False
+            rook = self.squares[row][rook_col].piece
+            if symbol in castling_rights and isinstance(king, King) and isinstance(rook, Rook) \
+                    and king.color == rook.color == ('white' if row == 7 else 'black'):
+                self.castling_rights |= bit
 
         # Set en passant target square
+        self.en_passant = None
         if en_passant != '-':
             col = ord(en_passant[0]) - ord('a')
             row = 8 - int(en_passant[1])
-            # The pawn that can be captured en passant is on the row behind this target square
-            # We'll mark that pawn's en_passant flag True
-            ep_pawn_row = row + 1 if self.next_player == 'black' else row - 1
-            if 0 <= ep_pawn_row < ROWS:
-                pawn = self.squares[ep_pawn_row][col].piece
-                if isinstance(pawn, Pawn) and pawn.color != self.next_player:
-                    pawn.en_passant = True
-
-        # Optionally reset move history or other states if you track them
+            self.en_passant = row * 8 + col
+
+        self.halfmove_clock = int(halfmove_clock)
+        self.fullmove_number = int(fullmove_number)
+
         self.move_history = []
         self.last_move = None
-        self.last_piece = None
+        self._key = self._compute_key()
 
     @property
     def current_turn(self):
@@ -4,6 +4,16 @@ import os
 from sound import Sound
 from theme import Theme
 
+_textures = {}
+
+def piece_texture(piece, size=80):
+    # piece images are resolved and loaded on first draw, then reused
+    key = (piece.color, piece.name, size)
+    if key not in _textures:
+        _textures[key] = pygame.image.load(
+            os.path.join(f'assets/images/imgs-{size}px/{piece.color}_{piece.name}.png'))
+    return _textures[key]
+
 class Config:
 
     def __init__(self):
@@ -5,4 +5,16 @@ HEIGHT = 800
 # Board dimensions
 ROWS = 8
 COLS = 8
-SQSIZE = WIDTH // COLS
\ No newline at end of file
+SQSIZE = WIDTH // COLS
+
+# Slider attacks from magic-bitboard tables (magic.py) instead of ray scans
+MAGIC_BITBOARDS = True
+
+# Positions kept in each board's legal-move cache (movecache.py); 0 disables it
+MOVE_CACHE_SIZE = 4096
+
+# Memory for each search's transposition table (transposition.py), in MB
+TT_SIZE_MB = 16
+
+# Seconds the GUI bot may think per move (search.py deepens until it runs out)
+BOT_MOVETIME = 1.0
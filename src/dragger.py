@@ -1,6 +1,7 @@
 import pygame
 
 from const import *
+from config import piece_texture
 
 class Dragger:
 
@@ -15,11 +16,8 @@ class Dragger:
     # blit method
 
     def update_blit(self, surface):
-        # texture
-        self.piece.set_texture(size=128)
-        texture = self.piece.texture
         # img
-        img = pygame.image.load(texture)
+        img = piece_texture(self.piece, size=128)
         # rect
         img_center = (self.mouseX, self.mouseY)
         self.piece.texture_rect = img.get_rect(center=img_center)
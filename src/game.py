@@ -3,7 +3,7 @@ import pygame
 from const import *
 from board import Board
 from dragger import Dragger
-from config import Config
+from config import Config, piece_texture
 from square import Square
 
 class Game:
@@ -58,8 +58,7 @@ class Game:
                     
                     # all pieces except dragger piece
                     if piece is not self.dragger.piece:
-                        piece.set_texture(size=80)
-                        img = pygame.image.load(piece.texture)
+                        img = piece_texture(piece, size=80)
                         img_center = col * SQSIZE + SQSIZE // 2, row * SQSIZE + SQSIZE // 2
                         piece.texture_rect = img.get_rect(center=img_center)
                         surface.blit(img, piece.texture_rect)
@@ -107,6 +106,7 @@ class Game:
 
     def next_turn(self):
         self.next_player = 'white' if self.next_player == 'black' else 'black'
+        self.board.next_turn()
 
     def set_hover(self, row, col):
         self.hovered_sqr = self.board.squares[row][col]
@@ -0,0 +1,114 @@
+import json
+import os
+import random
+
+from bitboard import FULL
+
+# Magic-bitboard slider lookups. For every square, the occupancy of the
+# squares that can block a slider is multiplied by a "magic" number whose
+# top bits index a table of precomputed attack sets, so a rook or bishop
+# attack set costs one multiply and one list lookup.
+#
+# Searching for magics takes close to a minute in Python, so the ones
+# found are kept in MAGIC_CACHE (magics.json, shipped next to this file).
+# Cached magics are checked while the tables are rebuilt at startup; a bad
+# or missing entry is searched for again and the cache rewritten.
+
+RANK_EDGES = 0xFF | 0xFF << 56
+FILE_EDGES = 0x0101_0101_0101_0101 | 0x8080_8080_8080_8080
+
+MAGIC_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'magics.json')
+
+
+def relevant_mask(sq, empty_attacks):
+    # attack set on an empty board minus the board edges (a piece on the
+    # edge can never block anything further along the ray)
+    rank = 0xFF << (sq & ~7)
+    file = 0x0101_0101_0101_0101 << (sq & 7)
+    edges = (RANK_EDGES & ~rank) | (FILE_EDGES & ~file)
+    return empty_attacks & ~edges
+
+def subsets(mask):
+    # every occupancy of the mask's squares (carry-rippler)
+    occ = 0
+    while True:
+        yield occ
+        occ = (occ - mask) & mask
+        if not occ:
+            return
+
+def _fill_table(magic, shift, occupancies, attacks):
+    table = [None] * (1 << (64 - shift))
+    for occ, att in zip(occupancies, attacks):
+        index = ((occ * magic) & FULL) >> shift
+        if table[index] is None:
+            table[index] = att
+        elif table[index] != att:
+            return None
+    return table
+
+def find_magic(mask, occupancies, attacks, shift, rng):
+    while True:
+        # sparse random numbers make good magics
+        magic = rng.getrandbits(64) & rng.getrandbits(64) & rng.getrandbits(64)
+        if bin((mask * magic) & 0xFF00_0000_0000_0000).count('1') < 6:
+            continue
+        table = _fill_table(magic, shift, occupancies, attacks)
+        if table is not None:
+            return magic, table
+
+
+class MagicSliders:
+
+    def __init__(self, reference, magics=None, seed=0):
+        # reference(sq, occ) is a slow but correct attack generator
+        self.masks = []
+        self.magics = []
+        self.shifts = []
+        self.tables = []
+        self.generated = 0
+        rng = random.Random(seed)
+        for sq in range(64):
+            mask = relevant_mask(sq, reference(sq, 0))
+            occupancies = list(subsets(mask))
+            attacks = [reference(sq, occ) for occ in occupancies]
+            shift = 64 - bin(mask).count('1')
+            magic = magics[sq] if magics else None
+            table = _fill_table(magic, shift, occupancies, attacks) if magic else None
+            if table is None:
+                magic, table = find_magic(mask, occupancies, attacks, shift, rng)
+                self.generated += 1
+            self.masks.append(mask)
+            self.magics.append(magic)
+            self.shifts.append(shift)
+            self.tables.append(table)
+
+    def lookup(self):
+        masks, magics, shifts, tables = self.masks, self.magics, self.shifts, self.tables
+
+        def attacks(sq, occ):
+            return tables[sq][((occ & masks[sq]) * magics[sq] & FULL) >> shifts[sq]]
+        return attacks
+
+
+def load_sliders(rook_reference, bishop_reference, cache_path=MAGIC_CACHE):
+    # (rook_attacks, bishop_attacks) backed by magic tables
+    cached = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = {}
+
+    rook = MagicSliders(rook_reference, cached.get('rook'), seed=1)
+    bishop = MagicSliders(bishop_reference, cached.get('bishop'), seed=2)
+
+    if cache_path and (rook.generated or bishop.generated):
+        try:
+            with open(cache_path, 'w') as f:
+                json.dump({'rook': rook.magics, 'bishop': bishop.magics}, f)
+        except OSError:
+            pass  # read-only checkout: just regenerate next time
+
+    return rook.lookup(), bishop.lookup()
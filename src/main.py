@@ -41,6 +41,7 @@ class Main:
         game = self.game
         board = game.board
         dragger = game.dragger
+        bot = None
 
         while True:
             self.screen.fill((30, 30, 30))
@@ -71,17 +72,19 @@ class Main:
                 # Let the bot play when it's its turn
                 if game.next_player == 'black' and not dragger.dragging:
                     from v4 import IntelligentBot
-                    bot = IntelligentBot(board, depth=3)
+                    # one bot per game, so its transposition table carries over between moves
+                    if bot is None or bot.board is not board:
+                        bot = IntelligentBot(board, depth=None, movetime=BOT_MOVETIME)
 
                     piece, move = bot.select_move('black')
                     if piece and move:
                         captured = board.squares[move.final.row][move.final.col].has_piece()
                         board.move(piece, move)
-                        board.set_true_en_passant(piece)
                         game.play_sound(captured)
                         game.next_turn()
 
                         print('FEN:', board.fen())
+                        print('PV:', bot.last_result.pv_line())
 
 
             for event in pygame.event.get():
@@ -116,7 +119,7 @@ class Main:
                         if board.squares[clicked_row][clicked_col].has_piece():
                             piece = board.squares[clicked_row][clicked_col].piece
                             if piece.color == game.next_player:
-                                board.calc_moves(piece, clicked_row, clicked_col, bool=True)
+                                board.calc_moves(piece, clicked_row, clicked_col)
                                 dragger.save_initial(event.pos)
                                 dragger.drag_piece(piece)
                                 game.show_bg(screen)
@@ -158,7 +161,6 @@ class Main:
                             if board.valid_move(dragger.piece, move):
                                 captured = board.squares[released_row][released_col].has_piece()
                                 board.move(dragger.piece, move)
-                                board.set_true_en_passant(dragger.piece)
                                 game.play_sound(captured)
                                 game.show_bg(screen)
                                 game.show_last_move(screen)
@@ -168,9 +170,9 @@ class Main:
                                 print('FEN:', board.fen())
 
 
-                                valid_moves = board.get_all_valid_moves(game.next_player)
-                                if not valid_moves:
-                                    if board.is_checkmate(game.next_player):
+                                status = board.game_status(game.next_player)
+                                if status != 'ongoing':
+                                    if status == 'checkmate':
                                         print(f"{game.next_player.capitalize()} is checkmated!")
                                     else:
                                         print(f"Stalemate! {game.next_player.capitalize()} has no valid moves.")
@@ -1,14 +1,17 @@
+import argparse
+
 from board import Board
 from v3_piece_square_table import IntelligentBot as BotV1  # Original bot
 from v4 import IntelligentBot as BotV2  # King safety bot
-import hashlib
 
-def test_bots(num_games=10):
-    """Test new bot against old bot"""
+def test_bots(num_games=10, depth=2, movetime=None):
+    """Test new bot against old bot, at fixed depth or fixed time (seconds) per move"""
     results = {"v1_wins": 0, "v2_wins": 0, "draws": 0}
+    if movetime is not None:
+        depth = None  # search as deep as the time allows
     
     print(f"Testing: V1 (Original) vs V2 (King Safety)")
-    print(f"Games: {num_games}")
+    print(f"Games: {num_games}, " + (f"{movetime}s per move" if movetime is not None else f"depth {depth}"))
     print("-" * 50)
     
     for game in range(num_games):
@@ -16,13 +19,13 @@ def test_bots(num_games=10):
         
         # Alternate colors each game
         if game % 2 == 0:
-            white_bot = BotV1(board, depth=2)
-            black_bot = BotV2(board, depth=2)
+            white_bot = BotV1(board, depth=depth, movetime=movetime)
+            black_bot = BotV2(board, depth=depth, movetime=movetime)
             white_name = "V1"
             black_name = "V2"
         else:
-            white_bot = BotV2(board, depth=2)
-            black_bot = BotV1(board, depth=2)
+            white_bot = BotV2(board, depth=depth, movetime=movetime)
+            black_bot = BotV1(board, depth=depth, movetime=movetime)
             white_name = "V2"
             black_name = "V1"
         
@@ -30,6 +33,8 @@ def test_bots(num_games=10):
         
         # Play the game
         winner = play_game(board, white_bot, black_bot)
+        print(f"  TT {white_name}: {white_bot.search.tt}")
+        print(f"  TT {black_name}: {black_bot.search.tt}")
         
         # Record result
         if winner == 'white':
@@ -73,37 +78,21 @@ def play_game(board, white_bot, black_bot, max_moves=150):
     moves = 0
     position_counts = {}
 
-    def board_hash(board):
-        """Simple hash using piece positions and turn."""
-        state_str = ""
-        for row in board.squares:
-            for square in row:
-                piece = square.piece
-                if piece:
-                    state_str += f"{piece.name[0]}{piece.color[0]}"
-                else:
-                    state_str += "."
-        state_str += board.current_turn
-        return hashlib.md5(state_str.encode()).hexdigest()
-
-
     while moves < max_moves:
         current_color = 'white' if moves % 2 == 0 else 'black'
         current_bot = white_bot if current_color == 'white' else black_bot
 
-        # Checkmate
-        if board.is_checkmate(current_color):
+        # Checkmate / stalemate
+        status = board.game_status(current_color)
+        if status == 'checkmate':
             print(f"Checkmate! {('black' if current_color == 'white' else 'white')} wins")
             return 'black' if current_color == 'white' else 'white'
-
-        # Stalemate
-        valid_moves = board.get_all_valid_moves(current_color)
-        if not valid_moves:
+        if status == 'stalemate':
             print("No valid moves left. Stalemate.")
             return 'draw'
 
         # Repetition detection
-        hash_key = board_hash(board)
+        hash_key = board.zobrist_key
         position_counts[hash_key] = position_counts.get(hash_key, 0) + 1
         if position_counts[hash_key] >= 3:
             print("Threefold repetition detected. Draw.")
@@ -116,7 +105,7 @@ def play_game(board, white_bot, black_bot, max_moves=150):
                 print("Bot returned no move.")
                 return 'draw'
 
-            print(f"{current_color.capitalize()} move {moves+1}: {piece.__class__.__name__} {move} Eval: {eval_score:.2f}")
+            print(f"{current_color.capitalize()} move {moves+1}: {piece.__class__.__name__} {move} Eval: {eval_score:.2f} Depth: {current_bot.last_result.depth} Nodes: {current_bot.last_result.nodes}+{current_bot.last_result.qnodes}q First cutoffs: {current_bot.last_result.first_cutoff_rate:.0%} PV: {current_bot.last_result.pv_line()}")
 
             board.make_move(piece, move)
             board.next_turn()
@@ -130,4 +119,9 @@ def play_game(board, white_bot, black_bot, max_moves=150):
     return 'draw'
 
 if __name__ == "__main__":
-    test_bots(20)
+    parser = argparse.ArgumentParser(description='Play the two bot versions against each other.')
+    parser.add_argument('--games', type=int, default=20)
+    parser.add_argument('--depth', type=int, default=2, help='fixed search depth per move')
+    parser.add_argument('--movetime', type=float, help='seconds per move instead of a fixed depth')
+    args = parser.parse_args()
+    test_bots(args.games, args.depth, args.movetime)
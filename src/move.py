@@ -1,16 +1,72 @@
+from array import array
+
+
+# Packed 16-bit moves used by move generation and search:
+# bits 0-5 from square, bits 6-11 to square, bits 12-15 flags.
+QUIET = 0
+DOUBLE_PUSH = 1 << 12
+KING_CASTLE = 2 << 12
+QUEEN_CASTLE = 3 << 12
+CAPTURE = 4 << 12
+EN_PASSANT = 5 << 12
+PROMOTION = 8 << 12
+# promotion piece in the low two flag bits (with CAPTURE for capture-promotions)
+PROMO_KNIGHT = 8 << 12
+PROMO_BISHOP = 9 << 12
+PROMO_ROOK = 10 << 12
+PROMO_QUEEN = 11 << 12
+FLAG_MASK = 0xF000
+
+MAX_MOVES = 256  # more than any legal position has
+MAX_PLY = 64
+
+
+def move_from(m):
+    return m & 63
+
+def move_to(m):
+    return (m >> 6) & 63
+
+def promotion_kind(m):
+    # bitboard piece kind (KNIGHT..QUEEN) a promotion turns into
+    return 1 + ((m >> 12) & 3)
+
+def square_name(sq):
+    # square index (a8 = 0) in algebraic notation
+    return 'abcdefgh'[sq & 7] + str(8 - (sq >> 3))
+
+def move_name(m):
+    # packed move in coordinate notation, e.g. e2e4 or e7e8q
+    name = square_name(move_from(m)) + square_name(move_to(m))
+    if m & PROMOTION:
+        name += 'nbrq'[promotion_kind(m) - 1]
+    return name
+
+def move_buffers(plies=MAX_PLY):
+    # one preallocated buffer per search ply for Board.generate_moves
+    return [array('H', bytes(2 * MAX_MOVES)) for ply in range(plies)]
+
 
 class Move:
 
-    def __init__(self, initial, final):
-        # initial and final are squares
+    __slots__ = ('initial', 'final', 'promotion')
+
+    def __init__(self, initial, final, promotion=None):
+        # initial and final are squares; promotion is the piece kind of an
+        # underpromotion (KNIGHT..ROOK), None for anything else, since a
+        # pawn reaching the last rank becomes a queen by default
         self.initial = initial
         self.final = final
+        self.promotion = promotion
 
     def __str__(self):
         s = ''
         s += f'({self.initial.col}, {self.initial.row})'
         s += f' -> ({self.final.col}, {self.final.row})'
+        if self.promotion is not None:
+            s += f' ={"nbrq"[self.promotion - 1]}'
         return s
 
     def __eq__(self, other):
-        return self.initial == other.initial and self.final == other.final
\ No newline at end of file
+        return (self.initial == other.initial and self.final == other.final
+                and self.promotion == other.promotion)
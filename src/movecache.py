@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+from const import MOVE_CACHE_SIZE
+
+class MoveCache:
+
+    # Bounded LRU cache of legal move lists. Board keys it by
+    # (zobrist key, colour), so make/unmake never has to invalidate
+    # anything: a changed position simply maps to a different entry.
+
+    def __init__(self, capacity=MOVE_CACHE_SIZE):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        moves = self.entries.get(key)
+        if moves is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return moves
+
+    def put(self, key, moves):
+        if self.capacity <= 0: return
+        self.entries[key] = moves
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)  # least recently used
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return f'{len(self.entries)}/{self.capacity} entries, {self.hits} hits, hit rate {self.hit_rate:.1%}'
@@ -0,0 +1,137 @@
+from board import PIECE_KINDS
+from bitboard import COLOR_INDEX, PAWN, BISHOP, ROOK, QUEEN, KING
+from attacks import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks
+from move import CAPTURE, EN_PASSANT, PROMOTION, FLAG_MASK, move_from, move_to, promotion_kind
+
+# Staged move ordering for the search bots. pick_moves is a generator that
+# hands out moves in the order
+#   hash move, winning captures, killers, countermove, quiet moves
+#   (best history score first), losing captures
+# where a capture is losing if its static exchange (see()) loses material
+# and only generates (and legality-checks) a stage once the search asks for
+# a move past the previous one, so a node that cuts off on its first
+# capture never generates its quiet moves.
+
+# MVV-LVA values by bitboard piece kind (pawn .. king)
+VALUES = (100, 320, 330, 500, 900, 20000)
+
+
+def capture_value(board, m):
+    # material the move wins outright: the victim, plus the new piece
+    # on a promotion
+    to_sq = move_to(m)
+    victim = board.squares[to_sq >> 3][to_sq & 7].piece
+    if victim:
+        value = VALUES[PIECE_KINDS[type(victim)]]
+    else:
+        value = VALUES[PAWN] if m & FLAG_MASK == EN_PASSANT else 0
+    if m & PROMOTION:
+        value += VALUES[promotion_kind(m)] - VALUES[PAWN]
+    return value
+
+def attacker_kind(board, m):
+    from_sq = move_from(m)
+    return PIECE_KINDS[type(board.squares[from_sq >> 3][from_sq & 7].piece)]
+
+def capture_gain(board, m):
+    # victim minus attacker; promotions also win the new piece
+    return capture_value(board, m) - VALUES[attacker_kind(board, m)]
+
+def mvv_lva(board, m):
+    # most valuable victim first, then least valuable attacker
+    return capture_value(board, m) * 8 - attacker_kind(board, m)
+
+def see(board, m):
+    # Static exchange evaluation: the material the side playing m ends up
+    # with once both sides have recaptured on its target square, each
+    # always with its least valuable attacker and free to stop when
+    # recapturing would lose. Works on a copy of the occupancy, so the
+    # board is never touched; sliders behind a capturer join in (x-rays).
+    from_sq, to_sq = move_from(m), move_to(m)
+    bbs = board.bitboards
+    occupancy = board.occupancy
+    occ = board.occupied ^ (1 << from_sq)
+    if m & FLAG_MASK == EN_PASSANT:
+        occ ^= 1 << ((from_sq & ~7) | (to_sq & 7))  # the captured pawn
+    diagonal = bbs[BISHOP] | bbs[QUEEN] | bbs[6 + BISHOP] | bbs[6 + QUEEN]
+    straight = bbs[ROOK] | bbs[QUEEN] | bbs[6 + ROOK] | bbs[6 + QUEEN]
+    attackers = ((KNIGHT_ATTACKS[to_sq] & (bbs[1] | bbs[7]))
+                 | (KING_ATTACKS[to_sq] & (bbs[KING] | bbs[6 + KING]))
+                 | (PAWN_ATTACKS[1][to_sq] & bbs[PAWN])
+                 | (PAWN_ATTACKS[0][to_sq] & bbs[6 + PAWN])
+                 | (rook_attacks(to_sq, occ) & straight)
+                 | (bishop_attacks(to_sq, occ) & diagonal)) & occ
+
+    gains = [capture_value(board, m)]
+    on_square = promotion_kind(m) if m & PROMOTION else attacker_kind(board, m)
+    side = COLOR_INDEX[board.squares[from_sq >> 3][from_sq & 7].piece.color] ^ 1
+    while True:
+        mine = attackers & occupancy[side]
+        if not mine:
+            break
+        for kind in range(6):
+            candidates = mine & bbs[side * 6 + kind]
+            if candidates:
+                break
+        occ ^= candidates & -candidates
+        if kind == PAWN or kind == BISHOP or kind == QUEEN:
+            attackers |= bishop_attacks(to_sq, occ) & diagonal
+        if kind == ROOK or kind == QUEEN:
+            attackers |= rook_attacks(to_sq, occ) & straight
+        attackers &= occ
+        if kind == KING and attackers & occupancy[side ^ 1]:
+            break  # the king can't capture onto a defended square
+        gains.append(VALUES[on_square] - gains[-1])
+        on_square = kind
+        side ^= 1
+
+    # each side only recaptures when that is better than stopping
+    for i in range(len(gains) - 1, 0, -1):
+        gains[i - 1] = -max(-gains[i - 1], gains[i])
+    return gains[0]
+
+def pick_moves(board, color, buf, hash_move=None, killers=(), counter=None, history=None):
+    # buf is the caller's move buffer for this ply; it is overwritten as
+    # the stages are generated. history is the search's butterfly table,
+    # indexed by colour * 4096 + (move & 0xFFF).
+    tried = []
+    if hash_move is not None and board.is_legal(color, hash_move):
+        tried.append(hash_move)
+        yield hash_move
+
+    n = board.generate_moves(color, buf, quiets=False)
+    good, bad = [], []
+    for m in buf[:n]:
+        if m in tried: continue
+        # taking a piece worth at least the capturer can't lose, so the
+        # exchange only needs working out for the others
+        gain = capture_gain(board, m)
+        if gain < 0:
+            gain = see(board, m)
+        # underpromotions are almost never best, leave them for the end
+        if gain >= 0 and not (m & PROMOTION and promotion_kind(m) != QUEEN):
+            good.append((mvv_lva(board, m), m))
+        else:
+            bad.append((gain, m))
+    good.sort(reverse=True)
+    for gain, m in good:
+        yield m
+
+    for m in (*killers, counter):
+        if not m or m in tried or (m & FLAG_MASK) >= CAPTURE: continue
+        if board.is_legal(color, m):
+            tried.append(m)
+            yield m
+
+    n = board.generate_moves(color, buf, captures=False)
+    quiets = buf[:n]
+    if history is not None:
+        base = COLOR_INDEX[color] * 4096
+        quiets = sorted(quiets, key=lambda m: history[base + (m & 0xFFF)], reverse=True)
+    for m in quiets:
+        if m not in tried:
+            yield m
+
+    bad.sort(reverse=True)
+    for gain, m in bad:
+        yield m
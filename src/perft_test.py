@@ -1,30 +1,314 @@
 from board import Board
-from move import Move
-from square import Square
+from bitboard import FULL
+from move import move_buffers, move_name
+from array import array
+from collections import Counter
+from itertools import count
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import argparse
+import os
+import sys
 import time
 
-def perft(board, depth):
+BUFFERS = move_buffers()
+
+# Standard perft positions (chessprogramming.org/Perft_Results):
+# name, FEN, node counts for depth 1, 2, ..., depth run by default
+POSITIONS = [
+    ('initial', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+     [20, 400, 8902, 197281, 4865609, 119060324], 4),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     [48, 2039, 97862, 4085603, 193690690], 3),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     [14, 191, 2812, 43238, 674624, 11030083], 5),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     [6, 264, 9467, 422333, 15833292], 4),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     [44, 1486, 62379, 2103487, 89941194], 3),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594, 164075551], 3),
+]
+
+def perft(board, depth, ply=0):
     if depth == 0:
         return 1
 
     total_nodes = 0
-    color = board.next_player
-    all_moves = board.get_all_valid_moves(color)
+    buf = BUFFERS[ply]
+    count = board.generate_moves(board.next_player, buf)
 
-    for piece, move in all_moves:
-        board.make_move(piece, move)
+    for i in range(count):
+        board.push(buf[i])
         board.next_turn()
-        total_nodes += perft(board, depth - 1)
-        board.unmake_move()
-        board.prev_turn()  # We'll define this
+        total_nodes += perft(board, depth - 1, ply + 1)
+        board.prev_turn()
+        board.pop()
 
     return total_nodes
 
-if __name__ == '__main__':
-    board = Board()
-    for depth in range(1, 6):
-        start = time.time()
+class PerftTable:
+
+    # Subtree counts by (zobrist key, depth) in two flat arrays sized from
+    # a memory budget (16 bytes an entry). Always-replace: a slot holds the
+    # last position that hashed to it.
+
+    def __init__(self, mb=16):
+        entries = 1 << max(0, (mb * 1024 * 1024 // 16).bit_length() - 1)
+        self.mask = entries - 1
+        self.keys = array('Q', bytes(8 * entries))
+        self.counts = array('Q', bytes(8 * entries))
+        self.probes = 0
+        self.hits = 0
+
+    @staticmethod
+    def entry_key(key, depth):
+        # mixes the depth into the key so each depth has its own slot
+        return key ^ (depth * 0x9E3779B97F4A7C15 & FULL)
+
+    def get(self, entry):
+        self.probes += 1
+        index = entry & self.mask
+        if self.keys[index] == entry:
+            self.hits += 1
+            return self.counts[index]
+        return None
+
+    def put(self, entry, nodes):
+        index = entry & self.mask
+        self.keys[index] = entry
+        self.counts[index] = nodes
+
+    def clear(self):
+        # empties the table in place, so one allocation serves a whole run
+        for column in (self.keys, self.counts):
+            column[:] = array(column.typecode, bytes(column.itemsize * len(column)))
+        self.probes = self.hits = 0
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+def bulk_perft(board, depth, table=None, ply=0):
+    # perft that counts the last ply from the length of the move list
+    # instead of playing it, and reuses subtree counts from table
+    if depth == 0:
+        return 1
+    if table is not None and depth > 1:
+        entry = table.entry_key(board.zobrist_key, depth)
+        nodes = table.get(entry)
+        if nodes is not None:
+            return nodes
+
+    buf = BUFFERS[ply]
+    count = board.generate_moves(board.next_player, buf)
+    if depth == 1:
+        return count
+
+    total_nodes = 0
+    for i in range(count):
+        board.push(buf[i])
+        board.next_turn()
+        total_nodes += bulk_perft(board, depth - 1, table, ply + 1)
+        board.prev_turn()
+        board.pop()
+
+    if table is not None:
+        table.put(entry, total_nodes)
+    return total_nodes
+
+def divide(board, depth):
+    # [(move, nodes)] for every root move
+    buf = BUFFERS[0]
+    results = []
+    for m in buf[:board.generate_moves(board.next_player, buf)]:
+        board.push(m)
+        board.next_turn()
+        results.append((m, perft(board, depth - 1, 1)))
+        board.prev_turn()
+        board.pop()
+    return results
+
+def split_positions(board, depth, ply=0, root=None):
+    # (root move, FEN) for every position depth plies below board; the
+    # move counters are left off so transpositions share a FEN
+    if depth == 0:
+        yield root, ' '.join(board.fen().split()[:4])
+        return
+    buf = BUFFERS[ply]
+    for m in buf[:board.generate_moves(board.next_player, buf)]:
+        board.push(m)
+        board.next_turn()
+        yield from split_positions(board, depth - 1, ply + 1, m if root is None else root)
+        board.prev_turn()
+        board.pop()
+
+_worker_board = None
+_worker_table = None
+_worker_run = None
+_runs = count(1)  # numbers the parallel runs, so workers know when to clear
+
+def _init_worker(hash_mb):
+    # each worker process keeps one board (and hash table) for all its tasks
+    global _worker_board, _worker_table
+    _worker_board = Board()
+    _worker_table = PerftTable(hash_mb) if hash_mb else None
+
+def _worker_ready(i):
+    time.sleep(0.05)  # long enough for every worker to take one
+    return os.getpid()
+
+def _perft_fen(fen, depth, bulk=False, run=None):
+    # (nodes, hash probes, hash hits) for one task; the worker's table is
+    # emptied by the first task of each run
+    global _worker_run
+    _worker_board.load_fen(fen)
+    table = _worker_table
+    if table is None:
+        return (bulk_perft(_worker_board, depth) if bulk else perft(_worker_board, depth)), 0, 0
+    if run != _worker_run:
+        table.clear()
+        _worker_run = run
+    probes, hits = table.probes, table.hits
+    nodes = bulk_perft(_worker_board, depth, table)
+    return nodes, table.probes - probes, table.hits - hits
+
+def start_pool(workers=None, hash_mb=0):
+    # Process pool for parallel_divide, started and warmed up once so that
+    # process start-up and board setup stay out of the timings. Use it as
+    # a context manager.
+    workers = workers or os.cpu_count()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(hash_mb,))
+    pool.workers = workers
+    list(pool.map(_worker_ready, range(workers)))
+    return pool
+
+def parallel_divide(board, depth, pool, split_depth=1, bulk=False, stats=None):
+    # divide() with the subtrees split_depth plies down searched in pool
+    # (see start_pool); each distinct position is searched once and its
+    # count credited to every root move that reaches it. The workers' hash
+    # probes and hits are added up in stats (a Counter) if it is given.
+    if depth < 2:
+        return divide(board, depth)
+    split_depth = max(1, min(split_depth, depth - 1))
+    tasks = {}  # FEN -> Counter of root move -> paths reaching it
+    for root, fen in split_positions(board, split_depth):
+        tasks.setdefault(fen, Counter())[root] += 1
+
+    buf = BUFFERS[0]
+    counts = {m: 0 for m in buf[:board.generate_moves(board.next_player, buf)]}
+    fens = list(tasks)
+    chunksize = max(1, len(fens) // (pool.workers * 16))
+    n = len(fens)
+    jobs = pool.map(_perft_fen, fens, [depth - split_depth] * n, [bulk] * n, [next(_runs)] * n, chunksize=chunksize)
+    for fen, (nodes, probes, hits) in zip(fens, jobs):
+        for root, paths in tasks[fen].items():
+            counts[root] += nodes * paths
+        if stats is not None:
+            stats['probes'] += probes
+            stats['hits'] += hits
+    return list(counts.items())
+
+def timed_perft(board, depth, pool=None, split_depth=1, bulk=False, table=None):
+    # pool=None runs in this process. bulk counts leaves without playing
+    # them, table is a PerftTable to use here, cleared before the clock
+    # starts (in parallel runs the pool's workers have their own).
+    stats = Counter()
+    if table is not None and pool is None:
+        table.clear()
+    start = time.perf_counter()
+    if pool is not None:
+        nodes = sum(nodes for m, nodes in parallel_divide(board, depth, pool, split_depth, bulk, stats))
+    elif bulk or table is not None:
+        nodes = bulk_perft(board, depth, table)
+    else:
         nodes = perft(board, depth)
-        end = time.time()
-        print(f"Perft depth {depth}: {nodes} (Time: {end - start:.2f}s)")
+    elapsed = time.perf_counter() - start
+    if table is not None and pool is None:
+        stats.update(probes=table.probes, hits=table.hits)
+    if stats['probes']:
+        print(f"  hash: {stats['probes']} probes, hit rate {stats['hits'] / stats['probes']:.1%}")
+    return nodes, elapsed
+
+def report(label, depth, nodes, elapsed, expected=None):
+    nps = nodes / elapsed if elapsed > 0 else 0
+    line = f"{label:<10} depth {depth}: {nodes:>10} nodes  {elapsed:7.2f}s  {nps:>9.0f} nps"
+    if expected is not None:
+        line += '  ok' if nodes == expected else f'  MISMATCH (expected {expected})'
+    print(line)
+
+def run_suite(max_depth=None, pool=None, split_depth=1, bulk=False, table=None):
+    # every depth up to the default (or max_depth) for each position;
+    # returns False on any wrong count
+    ok = True
+    total_nodes, total_time = 0, 0.0
+    for name, fen, counts, default_depth in POSITIONS:
+        board = Board()
+        board.load_fen(fen)
+        for depth in range(1, min(max_depth or default_depth, len(counts)) + 1):
+            nodes, elapsed = timed_perft(board, depth, pool, split_depth, bulk, table)
+            report(name, depth, nodes, elapsed, counts[depth - 1])
+            ok = ok and nodes == counts[depth - 1]
+            total_nodes += nodes
+            total_time += elapsed
+    print(f"total: {total_nodes} nodes in {total_time:.2f}s ({total_nodes / total_time:.0f} nps)")
+    print('all counts match' if ok else 'PERFT MISMATCH')
+    return ok
+
+def measure_scaling(board, depth, max_workers=None, split_depth=1, bulk=False, hash_mb=0):
+    # times the same perft with 1, 2, 4, ... workers up to max_workers
+    # (default: every core) and prints the speed-up over one worker
+    max_workers = max_workers or os.cpu_count()
+    counts = sorted({1 << i for i in range(max_workers.bit_length()) if 1 << i <= max_workers} | {max_workers})
+    base = None
+    for workers in counts:
+        with start_pool(workers, hash_mb) as pool:
+            nodes, elapsed = timed_perft(board, depth, pool, split_depth, bulk)
+        base = base or elapsed
+        report(f'{workers} proc', depth, nodes, elapsed)
+        print(f"  speed-up {base / elapsed:.2f}x, efficiency {base / elapsed / workers:.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Move generator perft suite and benchmark.')
+    parser.add_argument('--fen', help='run a single position instead of the standard suite')
+    parser.add_argument('--depth', type=int, help='depth for --fen, or the maximum depth for the suite')
+    parser.add_argument('--divide', action='store_true', help='print the node count under every root move')
+    parser.add_argument('--expect', type=int, help='expected node count for --fen')
+    parser.add_argument('--workers', type=int, help='search in this many processes (0 = one per core)')
+    parser.add_argument('--scaling', action='store_true', help='time --fen (or the start position) with 1, 2, 4, ... up to --workers processes')
+    parser.add_argument('--split-depth', type=int, default=1, help='ply at which the tree is split between workers')
+    parser.add_argument('--bulk', action='store_true', help='count the last ply from move-list lengths')
+    parser.add_argument('--hash', type=int, default=0, metavar='MB', help='cache subtree counts in a table of this size (implies --bulk)')
+    args = parser.parse_args()
 
+    board = Board()
+    board.load_fen(args.fen or POSITIONS[0][1])
+    if args.scaling:
+        measure_scaling(board, args.depth or 4, args.workers, args.split_depth, args.bulk, args.hash)
+        return 0
+
+    # one pool (or hash table) for the whole run, set up before anything is timed
+    table = PerftTable(args.hash) if args.hash and args.workers is None else None
+    with start_pool(args.workers, args.hash) if args.workers is not None else nullcontext() as pool:
+        if args.fen is None and not args.divide:
+            return 0 if run_suite(args.depth, pool, args.split_depth, args.bulk, table) else 1
+
+        depth = args.depth or 1
+        start = time.perf_counter()
+        if args.divide:
+            if pool is None:
+                results = divide(board, depth)
+            else:
+                results = parallel_divide(board, depth, pool, args.split_depth, args.bulk)
+            for m, nodes in sorted(results, key=lambda result: move_name(result[0])):
+                print(f"{move_name(m)}: {nodes}")
+            nodes = sum(nodes for m, nodes in results)
+            print(f"moves: {len(results)}")
+            elapsed = time.perf_counter() - start
+        else:
+            nodes, elapsed = timed_perft(board, depth, pool, args.split_depth, args.bulk, table)
+        report('perft', depth, nodes, elapsed, args.expect)
+        return 0 if args.expect is None or nodes == args.expect else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import time
+
+from bitboard import COLOR_INDEX
+from move import CAPTURE, FLAG_MASK, MAX_PLY, move_buffers, move_name
+from movepicker import capture_gain, capture_value, mvv_lva, pick_moves, see
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# One alpha-beta search shared by every bot. The evaluator is pluggable:
+# Search only needs a callable evaluate(color) that scores the board from
+# color's point of view, so v2/v3/v4 differ only in their evaluate() and
+# every search improvement made here applies to all of them.
+
+INF = 1000000
+MATE = 100000  # mate scores are MATE - plies to mate, so shorter mates score higher
+MATE_BOUND = MATE - MAX_PLY  # scores beyond this are mates
+DELTA_MARGIN = 200  # quiescence skips captures that can't get within this of alpha
+ASPIRATION_WINDOW = 50  # half-width of the first window around the last iteration's score
+ASPIRATION_MAX = 1000  # beyond this a failing side of the window opens fully
+
+
+def opponent(color):
+    return 'white' if color == 'black' else 'black'
+
+def score_to_tt(score, ply):
+    # mate scores are stored relative to the node, not the root
+    if score > MATE_BOUND: return score + ply
+    if score < -MATE_BOUND: return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    if score > MATE_BOUND: return score - ply
+    if score < -MATE_BOUND: return score + ply
+    return score
+
+
+class SearchResult:
+    __slots__ = ('move', 'score', 'pv', 'nodes', 'qnodes', 'depth', 'time', 'cutoffs', 'first_cutoffs')
+
+    def __init__(self, move, score, pv, nodes, depth=0, time=0.0, qnodes=0, cutoffs=0, first_cutoffs=0):
+        self.move = move    # packed best move, None if there are no legal moves
+        self.score = score  # from the side to move's point of view
+        self.pv = pv        # principal variation as packed moves, best move first
+        self.nodes = nodes  # over all iterations, including an unfinished last one
+        self.qnodes = qnodes  # quiescence nodes, counted apart from nodes
+        self.depth = depth  # deepest completed iteration
+        self.time = time    # seconds
+        self.cutoffs = cutoffs  # beta cutoffs in the main search
+        self.first_cutoffs = first_cutoffs  # ... of which on the first move tried
+
+    def pv_line(self):
+        # the principal variation in coordinate notation, e.g. 'e2e4 e7e5 g1f3'
+        return ' '.join(move_name(m) for m in self.pv)
+
+    @property
+    def first_cutoff_rate(self):
+        # how often the move ordering put the refutation first
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+
+class Search:
+    def __init__(self, board, evaluate, tt=None):
+        self.board = board
+        self.evaluate = evaluate
+        self.tt = tt  # kept between searches, so later moves reuse earlier work
+        self.buffers = move_buffers()  # one packed-move buffer per ply
+        self.killers = [[None, None] for ply in range(MAX_PLY)]
+        # butterfly history (colour, from, to) and the quiet move that last
+        # refuted each (colour, previous move's from, to); both are indexed
+        # by colour * 4096 + (move & 0xFFF) and kept between searches
+        self.history = [0] * 8192
+        self.countermoves = [0] * 8192
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.root_move = None  # best move of the last completed iteration
+        self.deadline = None
+        self.max_nodes = None
+        self.stopped = False
+
+    def search(self, color, depth=None, movetime=None, max_nodes=None):
+        # Iterative deepening: depth 1, 2, ... until depth is reached or the
+        # time (seconds) or node budget runs out. The result is the last
+        # completed iteration; depth 1 always completes so there is a move.
+        start = time.perf_counter()
+        self.nodes = 0
+        self.qnodes = 0
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.killers = [[None, None] for ply in range(MAX_PLY)]
+        self.history = [h >> 1 for h in self.history]  # age the previous move's scores
+        self.root_move = None
+        self.deadline = None
+        self.max_nodes = max_nodes
+        self.stopped = False
+        if self.tt is not None:
+            self.tt.new_search()
+        if depth is None:
+            depth = MAX_PLY - 1 if movetime is not None or max_nodes is not None else 1
+
+        result = SearchResult(None, 0, [], 0)
+        for iteration in range(1, depth + 1):
+            pv = []
+            score = self.aspiration(iteration, color, result.score if result.move is not None else None, pv)
+            if self.stopped:
+                break
+            result = SearchResult(pv[0] if pv else None, score, pv, self.nodes, iteration)
+            self.root_move = result.move
+            if result.move is None or abs(score) > MATE_BOUND:
+                break  # no legal moves, or a forced mate was found
+            elapsed = time.perf_counter() - start
+            if movetime is not None:
+                # the next iteration takes several times longer than this one,
+                # so don't start it unless most of the budget is left
+                if elapsed > movetime / 2:
+                    break
+                self.deadline = start + movetime
+        result.nodes = self.nodes
+        result.qnodes = self.qnodes
+        result.cutoffs = self.cutoffs
+        result.first_cutoffs = self.first_cutoffs
+        result.time = time.perf_counter() - start
+        return result
+
+    def aspiration(self, depth, color, guess, pv):
+        # Searches the root with a narrow window around guess (the last
+        # iteration's score), which cuts off more. When the score falls
+        # outside, that side of the window is widened (x4) and the
+        # iteration repeated; past ASPIRATION_MAX it opens completely.
+        if guess is None or abs(guess) > MATE_BOUND:
+            return self.negamax(depth, -INF, INF, color, 0, pv)
+        delta = ASPIRATION_WINDOW
+        alpha, beta = guess - delta, guess + delta
+        while True:
+            pv.clear()
+            score = self.negamax(depth, alpha, beta, color, 0, pv)
+            if self.stopped or alpha < score < beta:
+                return score
+            delta *= 4
+            if score <= alpha:
+                alpha = -INF if delta > ASPIRATION_MAX else guess - delta
+            else:
+                beta = INF if delta > ASPIRATION_MAX else guess + delta
+
+    def negamax(self, depth, alpha, beta, color, ply, pv):
+        # returns the score for color and fills pv with the best line
+        if depth == 0:
+            return self.quiesce(alpha, beta, color, ply)
+        self.nodes += 1
+        if self.nodes & 255 == 0 and self.out_of_budget():
+            self.stopped = True
+        if self.stopped:
+            return 0  # unwound by the callers, the iteration is thrown away
+        if ply == MAX_PLY - 1:
+            return self.evaluate(color)
+
+        board = self.board
+        tt = self.tt
+        hash_move = None
+        if tt is not None:
+            key = board.zobrist_key
+            entry = tt.probe(key)
+            if entry is not None:
+                tt_depth, tt_score, bound, hash_move = entry
+                # the root always searches, so there is a move to play and a PV
+                if ply > 0 and tt_depth >= depth:
+                    tt_score = score_from_tt(tt_score, ply)
+                    if (bound == EXACT or (bound == LOWER and tt_score >= beta)
+                            or (bound == UPPER and tt_score <= alpha)):
+                        return tt_score
+                hash_move = hash_move or None
+        if ply == 0 and self.root_move is not None:
+            hash_move = self.root_move
+
+        base = COLOR_INDEX[color] * 4096
+        prev = board.move_history[-1][0] if board.move_history else None
+        counter = self.countermoves[base + (prev & 0xFFF)] if prev is not None else 0  # 0: none
+
+        alpha_start = alpha
+        best = -INF
+        best_move = None
+        tried = 0
+        # moves are generated stage by stage, only as far as the loop gets
+        for move in pick_moves(board, color, self.buffers[ply], hash_move, self.killers[ply], counter, self.history):
+            tried += 1
+            child_pv = []
+            board.push(move)
+            board.next_turn()
+            if tried == 1:
+                score = -self.negamax(depth - 1, -beta, -alpha, opponent(color), ply + 1, child_pv)
+            else:
+                # principal variation search: with good ordering the first
+                # move is best, so the rest only need a zero-width window
+                # to prove they are worse, and a full search if they aren't
+                score = -self.negamax(depth - 1, -alpha - 1, -alpha, opponent(color), ply + 1, child_pv)
+                if alpha < score < beta and not self.stopped:
+                    child_pv = []
+                    score = -self.negamax(depth - 1, -beta, -alpha, opponent(color), ply + 1, child_pv)
+            board.prev_turn()
+            board.pop()
+            if self.stopped:
+                return 0
+
+            if score > best:
+                best = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    pv[:] = [move] + child_pv
+                    if alpha >= beta:
+                        self.cutoffs += 1
+                        if tried == 1:
+                            self.first_cutoffs += 1
+                        if (move & FLAG_MASK) < CAPTURE:
+                            self.store_killer(move, ply)
+                            self.history[base + (move & 0xFFF)] += depth * depth
+                            if prev is not None:
+                                self.countermoves[base + (prev & 0xFFF)] = move
+                        break
+
+        if best == -INF:  # no legal moves
+            return -MATE + ply if board.in_check(color) else 0
+
+        if tt is not None:
+            if best <= alpha_start:
+                tt.store(key, depth, score_to_tt(best, ply), UPPER, None)
+            else:
+                tt.store(key, depth, score_to_tt(best, ply), LOWER if best >= beta else EXACT, best_move)
+        return best
+
+    def quiesce(self, alpha, beta, color, ply):
+        # Plays out captures and promotions until the position is quiet, so
+        # leaves aren't evaluated in the middle of an exchange. The side to
+        # move may stand pat on the static evaluation instead of capturing;
+        # in check it has to answer with every evasion.
+        self.qnodes += 1
+        if self.qnodes & 255 == 0 and self.out_of_budget():
+            self.stopped = True
+        if self.stopped:
+            return 0
+
+        if ply == MAX_PLY - 1:
+            return self.evaluate(color)
+
+        board = self.board
+        in_check = board.in_check(color)
+        if in_check:
+            best = -INF
+        else:
+            best = self.evaluate(color)  # stand pat
+            if best >= beta:
+                return best
+            alpha = max(alpha, best)
+
+        buf = self.buffers[ply]
+        n = board.generate_moves(color, buf, quiets=in_check)
+        moves = sorted(buf[:n], key=lambda m: mvv_lva(board, m), reverse=True)
+        stand_pat = best
+        for move in moves:
+            if not in_check:
+                # delta pruning: even winning this piece leaves us below alpha
+                if stand_pat + capture_value(board, move) + DELTA_MARGIN <= alpha:
+                    continue
+                # captures that lose the exchange can't improve on standing pat
+                if capture_gain(board, move) < 0 and see(board, move) < 0:
+                    continue
+            board.push(move)
+            board.next_turn()
+            score = -self.quiesce(-beta, -alpha, opponent(color), ply + 1)
+            board.prev_turn()
+            board.pop()
+            if self.stopped:
+                return 0
+
+            if score > best:
+                best = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if in_check and n == 0:
+            return -MATE + ply
+        return best
+
+    def out_of_budget(self):
+        # the deadline is only set after depth 1, so that always completes
+        if self.max_nodes is not None and self.nodes + self.qnodes >= self.max_nodes and self.root_move is not None:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def store_killer(self, move, ply):
+        """Remembers a quiet move that caused a cutoff so it is tried early at the same ply."""
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+
+
+class SearchBot:
+    """Base for the search bots; subclasses only provide evaluate()."""
+
+    def __init__(self, board, depth=2, movetime=None, max_nodes=None):
+        # with a time (seconds) or node budget, depth is only an upper limit
+        # and may be None
+        self.board = board
+        self.depth = depth
+        self.movetime = movetime
+        self.max_nodes = max_nodes
+        self.color = None  # Bot's color (set when move is selected)
+        self.search = Search(board, self.evaluate_for, TranspositionTable())
+        self.last_result = None
+
+    def evaluate(self):
+        """Scores the board from self.color's point of view."""
+        raise NotImplementedError
+
+    def evaluate_for(self, color):
+        # evaluate() is symmetric, so the opponent's score is its negation
+        score = self.evaluate()
+        return score if color == self.color else -score
+
+    def select_move(self, color, return_eval=False):
+        self.color = color
+        result = self.last_result = self.search.search(color, self.depth, self.movetime, self.max_nodes)
+
+        # convert back to (piece, Move) for the GUI and match manager
+        best_piece, best_move = self.board.to_move(result.move) if result.move is not None else (None, None)
+
+        if return_eval:
+            return best_piece, best_move, result.score
+        else:
+            return best_piece, best_move
+
+    def _opponent_color(self):
+        return opponent(self.color)
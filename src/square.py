@@ -1,13 +1,40 @@
 
+import copy
+
 class Square:
 
+    __slots__ = ('row', 'col', 'piece', 'alphacol')
+
     ALPHACOLS = {0: 'a', 1: 'b', 2: 'c', 3: 'd', 4: 'e', 5: 'f', 6: 'g', 7: 'h'}
 
-    def __init__(self, row, col, piece=None):
-        self.row = row
-        self.col = col
-        self.piece = piece
-        self.alphacol = self.ALPHACOLS[col]
+    def __new__(cls, row, col, piece=None):
+        # Square(row, col) hands out one shared, read-only instance per
+        # coordinate (writes to it raise); board cells hold a piece and
+        # come from Square.cell
+        if piece is None and 0 <= row < 8 and 0 <= col < 8:
+            return _FLYWEIGHTS[row * 8 + col]
+        return cls.cell(row, col, piece)
+
+    @classmethod
+    def cell(cls, row, col, piece=None):
+        square = object.__new__(cls)
+        square.row = row
+        square.col = col
+        square.piece = piece
+        square.alphacol = cls.ALPHACOLS[col]
+        return square
+
+    def __reduce__(self):
+        # copy and pickle: shared squares come back as themselves, cells as
+        # new cells holding the same piece
+        if isinstance(self, _SharedSquare):
+            return Square, (self.row, self.col)
+        return Square.cell, (self.row, self.col, self.piece)
+
+    def __deepcopy__(self, memo):
+        if isinstance(self, _SharedSquare):
+            return self
+        return Square.cell(self.row, self.col, copy.deepcopy(self.piece, memo))
 
     def __eq__(self, other):
         return self.row == other.row and self.col == other.col
@@ -44,4 +71,25 @@ class Square:
     @staticmethod
     def get_alphacol(col):
         ALPHACOLS = {0: 'a', 1: 'b', 2: 'c', 3: 'd', 4: 'e', 5: 'f', 6: 'g', 7: 'h'}
-        return ALPHACOLS[col]
\ No newline at end of file
+        return ALPHACOLS[col]
+
+class _SharedSquare(Square):
+
+    # The instances Square(row, col) returns. Every Move on a square holds
+    # the same one, so writing to it would change all of them.
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'Square({self.row}, {self.col}) is shared and read-only; use Square.cell() for a square that holds a piece')
+
+    def __delattr__(self, name):
+        self.__setattr__(name, None)
+
+def _shared_square(row, col):
+    square = object.__new__(_SharedSquare)
+    for name, value in (('row', row), ('col', col), ('piece', None), ('alphacol', Square.ALPHACOLS[col])):
+        object.__setattr__(square, name, value)
+    return square
+
+_FLYWEIGHTS = [_shared_square(row, col) for row in range(8) for col in range(8)]
@@ -0,0 +1,84 @@
+from array import array
+
+from const import TT_SIZE_MB
+
+# Bound types of a stored score
+EXACT = 1  # the score is exact
+LOWER = 2  # the search failed high, the score is a lower bound
+UPPER = 3  # the search failed low, the score is an upper bound
+
+ENTRY_SIZE = 17  # bytes per entry: key 8, score 4, move 2, depth, bound, age 1 each
+
+class TranspositionTable:
+
+    # Search results by zobrist key, in parallel arrays allocated once from
+    # a memory budget. Each index is a bucket of two entries: slot 0 keeps
+    # the deepest result (replaced only by an equal or deeper search, or by
+    # anything once it is from an older search), slot 1 takes whatever
+    # slot 0 turns away. Key 0 marks an empty entry.
+
+    def __init__(self, mb=TT_SIZE_MB):
+        buckets = 1 << max(0, (mb * 1024 * 1024 // (2 * ENTRY_SIZE)).bit_length() - 1)
+        size = 2 * buckets
+        self.mask = buckets - 1
+        self.keys = array('Q', bytes(8 * size))
+        self.scores = array('i', bytes(4 * size))
+        self.moves = array('H', bytes(2 * size))
+        self.depths = array('b', bytes(size))
+        self.bounds = array('B', bytes(size))
+        self.ages = array('B', bytes(size))
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        # entries from earlier searches stay usable but lose their slot-0 priority
+        self.age = (self.age + 1) & 0xFF
+
+    def probe(self, key):
+        # (depth, score, bound, move) or None; move is 0 when there is none
+        self.probes += 1
+        i = (key & self.mask) << 1
+        keys = self.keys
+        if keys[i] != key:
+            i += 1
+            if keys[i] != key:
+                return None
+        self.hits += 1
+        return self.depths[i], self.scores[i], self.bounds[i], self.moves[i]
+
+    def store(self, key, depth, score, bound, move):
+        i = (key & self.mask) << 1
+        keys = self.keys
+        if keys[i] != key and keys[i] != 0 and depth < self.depths[i] and self.ages[i] == self.age:
+            i += 1  # slot 0 holds a deeper result from this search
+        if keys[i] != key and keys[i] != 0:
+            self.overwrites += 1
+        elif keys[i] == key and not move:
+            move = self.moves[i]  # keep the old best move rather than losing it
+        keys[i] = key
+        self.scores[i] = score
+        self.moves[i] = move or 0
+        self.depths[i] = depth
+        self.bounds[i] = bound
+        self.ages[i] = self.age
+        self.stores += 1
+
+    def clear(self):
+        for column in (self.keys, self.scores, self.moves, self.depths, self.bounds, self.ages):
+            column[:] = array(column.typecode, bytes(column.itemsize * len(column)))
+        self.age = 0
+        self.probes = self.hits = self.stores = self.overwrites = 0
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __str__(self):
+        return (f'{len(self.keys)} entries, {self.probes} probes, {self.hits} hits, '
+                f'hit rate {self.hit_rate:.1%}, {self.overwrites} overwrites')
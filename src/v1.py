@@ -1,4 +1,3 @@
-import copy
 from piece import Pawn, Knight, Bishop, Rook, Queen, King
 
 piece_values = {
@@ -35,7 +34,7 @@ class IntelligentBot:
 
         moves = self.board.get_all_valid_moves(color)
         for piece, move in moves:
-            board_copy = copy.deepcopy(self.board)
+            board_copy = self.board.clone()
             initial = move.initial
             piece_copy = board_copy.squares[initial.row][initial.col].piece
 
@@ -64,7 +63,7 @@ class IntelligentBot:
         if maximizing:
             max_eval = float('-inf')
             for piece, move in moves:
-                board_copy = copy.deepcopy(board)
+                board_copy = board.clone()
                 initial = move.initial
                 piece_copy = board_copy.squares[initial.row][initial.col].piece
                 board_copy.move(piece_copy, move, testing=True)
@@ -77,7 +76,7 @@ class IntelligentBot:
         else:
             min_eval = float('inf')
             for piece, move in moves:
-                board_copy = copy.deepcopy(board)
+                board_copy = board.clone()
                 initial = move.initial
                 piece_copy = board_copy.squares[initial.row][initial.col].piece
                 board_copy.move(piece_copy, move, testing=True)
@@ -1,5 +1,7 @@
 import copy
 from piece import Pawn, Knight, Bishop, Rook, Queen, King
+from search import SearchBot
+from bitboard import COLOR_INDEX, popcount
 
 piece_values = {
     Pawn: 100,
@@ -76,12 +78,7 @@ king_pst = [
         [ 20,  30,  10,   0,   0,  10,  30,  20]
     ]
 
-class IntelligentBot:
-    def __init__(self, board, depth=2):
-        self.board = board
-        self.depth = depth
-        self.color = None  # Bot's color (set when move is selected)
-
+class IntelligentBot(SearchBot):
     def evaluate(self):
         score = 0
         
@@ -131,12 +128,10 @@ class IntelligentBot:
 
     def find_king(self, color):
         """Find the position of the king for given color"""
-        for row_idx, row in enumerate(self.board.squares):
-            for col_idx, square in enumerate(row):
-                piece = square.piece
-                if piece and isinstance(piece, King) and piece.color == color:
-                    return (row_idx, col_idx)
-        return None
+        sq = self.board.king_square[COLOR_INDEX[color]]
+        if sq is None:
+            return None
+        return (sq >> 3, sq & 7)
 
     def evaluate_pawn_shield(self, king_pos, color):
         """Evaluate the pawn shield in front of the king"""
@@ -228,67 +223,7 @@ class IntelligentBot:
 
     def count_attackers(self, target_row, target_col, color):
         """Count how many pieces of given color can attack the target square"""
-        attackers = 0
-        
-        for row_idx, row in enumerate(self.board.squares):
-            for col_idx, square in enumerate(row):
-                piece = square.piece
-                if piece and piece.color == color:
-                    if self.can_piece_attack(piece, row_idx, col_idx, target_row, target_col):
-                        attackers += 1
-        
-        return attackers
-
-    def can_piece_attack(self, piece, from_row, from_col, to_row, to_col):
-        """Check if a piece can attack a target square (simplified check)"""
-        if isinstance(piece, Pawn):
-            direction = -1 if piece.color == 'white' else 1
-            if from_row + direction == to_row and abs(from_col - to_col) == 1:
-                return True
-        
-        elif isinstance(piece, Knight):
-            row_diff = abs(from_row - to_row)
-            col_diff = abs(from_col - to_col)
-            if (row_diff == 2 and col_diff == 1) or (row_diff == 1 and col_diff == 2):
-                return True
-        
-        elif isinstance(piece, Bishop):
-            if abs(from_row - to_row) == abs(from_col - to_col):
-                return self.is_diagonal_clear(from_row, from_col, to_row, to_col)
-        
-        elif isinstance(piece, Rook):
-            if from_row == to_row or from_col == to_col:
-                return self.is_path_clear(from_row, from_col, to_row, to_col)
-        
-        elif isinstance(piece, Queen):
-            if (from_row == to_row or from_col == to_col or 
-                abs(from_row - to_row) == abs(from_col - to_col)):
-                return self.is_path_clear(from_row, from_col, to_row, to_col)
-        
-        elif isinstance(piece, King):
-            if abs(from_row - to_row) <= 1 and abs(from_col - to_col) <= 1:
-                return True
-        
-        return False
-
-    def is_path_clear(self, from_row, from_col, to_row, to_col):
-        """Check if path is clear for rook/queen movement"""
-        row_step = 0 if from_row == to_row else (1 if to_row > from_row else -1)
-        col_step = 0 if from_col == to_col else (1 if to_col > from_col else -1)
-        
-        current_row, current_col = from_row + row_step, from_col + col_step
-        
-        while current_row != to_row or current_col != to_col:
-            if self.board.squares[current_row][current_col].piece:
-                return False
-            current_row += row_step
-            current_col += col_step
-        
-        return True
-
-    def is_diagonal_clear(self, from_row, from_col, to_row, to_col):
-        """Check if diagonal path is clear for bishop movement"""
-        return self.is_path_clear(from_row, from_col, to_row, to_col)
+        return popcount(self.board.attackers_to(target_row * 8 + target_col, color))
 
     def evaluate_king_exposure(self, king_pos, color):
         """Penalize king being too far from back rank"""
@@ -300,79 +235,6 @@ class IntelligentBot:
         
         return distance_penalty
 
-    def select_move(self, color, return_eval=False):
-        self.color = color
-        best_score = float('-inf')
-        best_move = None
-        best_piece = None
-
-        moves = self.board.get_all_valid_moves(color)
-        moves.sort(key=lambda m: self.score_move(*m), reverse=True)
-
-        for piece, move in moves:
-            self.board.make_move(piece, move)
-            self.board.next_turn()
-
-            score = self.minimax(self.depth - 1, float('-inf'), float('inf'), False)
-
-            self.board.prev_turn()
-            self.board.unmake_move()
-
-            if score > best_score:
-                best_score = score
-                best_move = move
-                best_piece = piece
-
-        if return_eval:
-            return best_piece, best_move, best_score
-        else:
-            return best_piece, best_move
-
-
-    def minimax(self, depth, alpha, beta, maximizing):
-        if depth == 0 or self.board.is_checkmate(self.color) or self.board.is_checkmate(self._opponent_color()):
-            return self.evaluate()
-
-        color = self.color if maximizing else self._opponent_color()
-        moves = self.board.get_all_valid_moves(color)
-        moves.sort(key=lambda m: self.score_move(*m), reverse=True)
-
-        if not moves:
-            return self.evaluate()
-
-        if maximizing:
-            max_eval = float('-inf')
-            for piece, move in moves:
-                self.board.make_move(piece, move)
-                self.board.next_turn()
-
-                eval = self.minimax(depth - 1, alpha, beta, False)
-
-                self.board.prev_turn()
-                self.board.unmake_move()
-
-                max_eval = max(max_eval, eval)
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for piece, move in moves:
-                self.board.make_move(piece, move)
-                self.board.next_turn()
-
-                eval = self.minimax(depth - 1, alpha, beta, True)
-
-                self.board.prev_turn()
-                self.board.unmake_move()
-
-                min_eval = min(min_eval, eval)
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval
-
     def pst_bonus(self, piece, row, col):
         if isinstance(piece, Pawn):
             table = pawn_pst
@@ -391,14 +253,3 @@ class IntelligentBot:
 
         # Flip for black pieces (mirror vertically)
         return table[row][col] if piece.color == 'white' else table[7 - row][col]
-
-    def _opponent_color(self):
-        return 'white' if self.color == 'black' else 'black'
-
-    def score_move(self, piece, move):
-        """Assigns a score to the move based on MVV-LVA (Most Valuable Victim - Least Valuable Attacker)."""
-        if move.final.piece:
-            victim_value = piece_values.get(type(move.final.piece), 0)
-            attacker_value = piece_values.get(type(piece), 1)
-            return 10_000 + victim_value - attacker_value  # High priority for better captures
-        return 0  # Quiet move
\ No newline at end of file
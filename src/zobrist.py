@@ -0,0 +1,10 @@
+import random
+
+# Fixed seed so the same position gets the same key in every run.
+_rng = random.Random(0x5EED)
+
+# indexed [color * 6 + kind][square], like Board.bitboards
+PIECE_KEYS = [[_rng.getrandbits(64) for sq in range(64)] for piece in range(12)]
+SIDE_KEY = _rng.getrandbits(64)  # xored in when black is to move
+CASTLING_KEYS = [_rng.getrandbits(64) for rights in range(16)]
+EP_KEYS = [_rng.getrandbits(64) for file in range(8)]